@@ -0,0 +1,209 @@
+"""
+Benchmark harness for opy
+
+Obfuscates (or analyzes) synthetic projects of growing size and reports the
+throughput in files and megabytes per second, the peak memory use and how the
+time per file scales with the number of files.  Each measurement runs in a
+fresh process, so it includes everything a command line run does, e.g.
+collecting the skip words, and its peak memory use isn't inflated by earlier
+measurements.
+
+The results can be stored as a baseline and later runs compared against it,
+failing if throughput or memory use regressed by more than a tolerance:
+
+    python run_benchmarks.py --save-baseline baseline.json
+    python run_benchmarks.py --baseline baseline.json
+
+Timings only compare meaningfully on the same machine and Python version,
+so create the baseline there before making the change to be judged.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+thisDir = os.path.dirname( os.path.realpath( __file__ ) )
+repoDir = os.path.dirname( thisDir )
+sys.path.insert( 0, repoDir )  # Benchmark this working copy of opy, rather than an installed one
+
+import synthetic_project
+
+MODES           = [ 'obfuscate', 'analyze' ]
+DEFAULT_SIZES   = [ 10, 50, 200, 500 ]
+RESULT_MARKER   = 'BENCHMARK_RESULT '
+MEGABYTE        = 1024.0 * 1024.0
+
+def getPeakRss():
+    """
+    Returns the peak resident set size of this process in bytes, or None if unknown, e.g. on Windows
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peakRss = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+    return peakRss if sys.platform == 'darwin' else peakRss * 1024   # Linux reports kilobytes
+
+def measure( mode, sourceDirectory, targetDirectory, jobs ):
+    """
+    Runs opy once in this process and prints the outcome as JSON, marked so it can be told from opy's output
+    """
+    from opy import Obfuscator, OpyConfig
+    config = OpyConfig()
+    config.external_modules = sorted( set( config.external_modules +
+                                           synthetic_project.STANDARD_IMPORTS ) )
+    config.skip_extensions = [ 'pyc' ]
+    config.jobs = jobs
+
+    startTime = time.time()
+    obfuscator = Obfuscator( configSettings=config )
+    if mode == 'analyze':
+        results = obfuscator.analyze( sourceDirectory )
+    else:
+        results = obfuscator.obfuscate( sourceDirectory, targetDirectory )
+    seconds = time.time() - startTime
+
+    print( RESULT_MARKER + json.dumps( { "seconds"          : seconds
+                                       , "files"            : len( results.fileStatsDict )
+                                       , "bytes"            : results.getBytesIn()
+                                       , "peakRss"          : getPeakRss()
+                                       , "phaseSecondsDict" : results.phaseSecondsDict
+                                       } ) )
+
+def runMeasurement( mode, sourceDirectory, targetDirectory, jobs ):
+    output = subprocess.check_output( [ sys.executable, os.path.realpath( __file__ ),
+        '--measure', mode, sourceDirectory, targetDirectory, str( jobs ) ] )
+    for line in output.decode( 'utf-8' ).splitlines():
+        if line.startswith( RESULT_MARKER ):
+            return json.loads( line[ len( RESULT_MARKER ): ] )
+    raise RuntimeError( 'No benchmark result in output:\n' + output.decode( 'utf-8' ) )
+
+def runBenchmarks( sizes, identifierCount, modes, jobs, repeat, verify ):
+    """
+    Returns a list with a result dict per mode and size, the best of repeat measurements each
+    """
+    resultList = []
+    workDirectory = tempfile.mkdtemp( prefix='opy_benchmark_' )
+    try:
+        for size in sizes:
+            sourceDirectory = os.path.join( workDirectory, 'project_%d' % (size,) )
+            targetDirectory = sourceDirectory + '_opy'
+            synthetic_project.makeProject( sourceDirectory, size, identifierCount )
+            for mode in modes:
+                measurements = []
+                for _ in range( repeat ):
+                    if os.path.exists( targetDirectory ): shutil.rmtree( targetDirectory )
+                    measurements.append( runMeasurement( mode, sourceDirectory, targetDirectory, jobs ) )
+                best = min( measurements, key=lambda measurement: measurement["seconds"] )
+                peakRssList = [ measurement["peakRss"] for measurement in measurements
+                                if measurement["peakRss"] is not None ]
+                resultList.append( { "mode"             : mode
+                                   , "modules"          : size
+                                   , "files"            : best["files"]
+                                   , "megabytes"        : best["bytes"] / MEGABYTE
+                                   , "seconds"          : best["seconds"]
+                                   , "filesPerSecond"   : best["files"] / best["seconds"]
+                                   , "megabytesPerSecond" : best["bytes"] / MEGABYTE / best["seconds"]
+                                   , "peakRssMegabytes" : max( peakRssList ) / MEGABYTE if peakRssList else None
+                                   , "phaseSecondsDict" : best["phaseSecondsDict"]
+                                   } )
+                if verify and mode == 'obfuscate':
+                    verifyProject( sourceDirectory, targetDirectory )
+    finally:
+        shutil.rmtree( workDirectory, ignore_errors=True )
+    return resultList
+
+def verifyProject( sourceDirectory, targetDirectory ):
+    # The obfuscated project should compute the same as the original one
+    outputs = [ subprocess.check_output( [ sys.executable, synthetic_project.MAIN_MODULE_NAME + '.py' ],
+                                         cwd=directory ) for directory in (sourceDirectory, targetDirectory) ]
+    if outputs[0] != outputs[1]:
+        raise RuntimeError( 'Obfuscated project in %s behaves differently' % (targetDirectory,) )
+
+def printReport( resultList ):
+    print( '%-10s %8s %8s %9s %9s %8s %12s %9s' % (
+        'mode', 'files', 'MB', 'seconds', 'files/s', 'MB/s', 'peak RSS MB', 'scaling') )
+    for mode in MODES:
+        modeResultList = [ result for result in resultList if result["mode"] == mode ]
+        for result in modeResultList:
+            # The time per file relative to that of the smallest project, 1.00 meaning linear scaling
+            scaling = ( modeResultList[0]["filesPerSecond"] / result["filesPerSecond"] )
+            print( '%-10s %8d %8.2f %9.3f %9.1f %8.2f %12s %9.2f' % (
+                result["mode"], result["files"], result["megabytes"], result["seconds"],
+                result["filesPerSecond"], result["megabytesPerSecond"],
+                '-' if result["peakRssMegabytes"] is None else '%.1f' % (result["peakRssMegabytes"],),
+                scaling ) )
+
+def compareToBaseline( resultList, baseline, tolerance ):
+    """
+    Prints how the results compare to the baseline and returns the number of regressions
+    """
+    baselineDict = dict( ((result["mode"], result["modules"]), result)
+                         for result in baseline["results"] )
+    regressionCount = 0
+    print( '\nCompared to baseline of %s, Python %s (tolerance %d%%):' % (
+        baseline["created"], baseline["python"], tolerance * 100) )
+    for result in resultList:
+        baselineResult = baselineDict.get( (result["mode"], result["modules"]) )
+        if baselineResult is None:
+            print( '%-10s %8d modules: not in baseline' % (result["mode"], result["modules"]) )
+            continue
+        speedRatio = result["filesPerSecond"] / baselineResult["filesPerSecond"]
+        remarks = []
+        if speedRatio < 1 - tolerance:
+            remarks.append( 'SLOWER' )
+        if( result["peakRssMegabytes"] and baselineResult["peakRssMegabytes"] and
+            result["peakRssMegabytes"] > baselineResult["peakRssMegabytes"] * (1 + tolerance) ):
+            remarks.append( 'MORE MEMORY' )
+        regressionCount += len( remarks )
+        print( '%-10s %8d modules: %6.2fx throughput %s' % (
+            result["mode"], result["modules"], speedRatio,
+            ('REGRESSION: ' + ', '.join( remarks )) if remarks else 'ok') )
+    return regressionCount
+
+def main():
+    parser = argparse.ArgumentParser( description='Benchmarks opy on synthetic projects' )
+    parser.add_argument( '--sizes', default=','.join( str( size ) for size in DEFAULT_SIZES ),
+                         help='comma separated numbers of modules per project' )
+    parser.add_argument( '--identifiers', type=int, default=50, help='identifiers per module' )
+    parser.add_argument( '--mode', choices=MODES + [ 'both' ], default='both' )
+    parser.add_argument( '--jobs', type=int, default=1, help='worker processes, 0 meaning one per cpu' )
+    parser.add_argument( '--repeat', type=int, default=3, help='measurements per project, the fastest counts' )
+    parser.add_argument( '--verify', action='store_true', help='check that the obfuscated projects still run' )
+    parser.add_argument( '--baseline', help='baseline JSON file to compare against' )
+    parser.add_argument( '--save-baseline', help='JSON file to store the results in as a new baseline' )
+    parser.add_argument( '--tolerance', type=float, default=0.25, help='allowed relative regression' )
+    args = parser.parse_args()
+
+    resultList = runBenchmarks( [ int( size ) for size in args.sizes.split( ',' ) ], args.identifiers,
+                                MODES if args.mode == 'both' else [ args.mode ],
+                                args.jobs, args.repeat, args.verify )
+    printReport( resultList )
+
+    if args.save_baseline:
+        with open( args.save_baseline, 'w' ) as f:
+            json.dump( { "created"     : time.strftime( '%Y-%m-%d' )
+                       , "python"      : platform.python_version()
+                       , "platform"    : platform.platform()
+                       , "identifiers" : args.identifiers
+                       , "jobs"        : args.jobs
+                       , "results"     : resultList
+                       }, f, indent=4 )
+        print( '\nBaseline saved in %s' % (args.save_baseline,) )
+
+    if args.baseline:
+        with open( args.baseline ) as f:
+            baseline = json.load( f )
+        if compareToBaseline( resultList, baseline, args.tolerance ):
+            sys.exit( 1 )
+
+if __name__ == '__main__':
+    if len( sys.argv ) == 6 and sys.argv[1] == '--measure':
+        measure( sys.argv[2], sys.argv[3], sys.argv[4], int( sys.argv[5] ) )
+    else:
+        main()
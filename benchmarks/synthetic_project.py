@@ -0,0 +1,153 @@
+"""
+Generates a synthetic, runnable Python project to benchmark opy on
+
+The project consists of a number of packages, each holding a number of
+modules and a data file.  Every module defines classes, functions and module
+level names, uses string literals (plain, formatted and concatenated ones)
+and comments, and imports both standard modules and modules generated before
+it, so the obfuscation has to keep all of those consistent.  A main module imports all
+of them and calls each module's entry function, so an obfuscated version of
+the project can be run to check it still works.
+
+The same arguments always produce the same project.
+"""
+import os
+import sys
+import random
+
+MODULES_PER_PACKAGE = 20
+STANDARD_IMPORTS    = [ 'os', 'sys', 're', 'math', 'random', 'collections' ]
+MAIN_MODULE_NAME    = 'main'
+
+__syllables = [ 'ka', 'lo', 'mi', 'nu', 'pe', 'ra', 'si', 'to', 'va', 'ze',
+                'bar', 'dek', 'fin', 'gul', 'hop', 'jet', 'mox', 'pin' ]
+
+def makeProject( rootDirectory, moduleCount, identifierCount=50, seed=1 ):
+    """
+    Writes a project of moduleCount modules, each defining about identifierCount identifiers,
+    into rootDirectory and returns the list of the relative paths of the modules
+    """
+    generator = random.Random( seed )
+    usedNames = set()
+
+    def makeName( prefix='' ):
+        while True:
+            name = prefix + ''.join( generator.choice( __syllables )
+                                     for _ in range( generator.randint( 2, 4 ) ) )
+            if name not in usedNames:
+                usedNames.add( name )
+                return name
+
+    moduleList = []     # (package name, module name, constant names)
+    relPathList = []
+    for moduleIndex in range( moduleCount ):
+        packageName = 'package_%d' % (moduleIndex // MODULES_PER_PACKAGE,)
+        packageDirectory = os.path.join( rootDirectory, packageName )
+        if moduleIndex % MODULES_PER_PACKAGE == 0:
+            os.makedirs( packageDirectory )
+            __writeFile( os.path.join( packageDirectory, '__init__.py' ),
+                         '# Generated package %s\n' % (packageName,) )
+            relPathList.append( '%s/__init__.py' % (packageName,) )
+            __writeFile( os.path.join( packageDirectory, 'data.txt' ),    # An asset, copied rather than obfuscated
+                         'Data of %s\n' % (packageName,) * 100 )
+
+        moduleName = makeName( 'mod_' )
+        importedList = generator.sample( moduleList, min( 3, len( moduleList ) ) )
+        content, constantNames = __makeModule( generator, makeName, identifierCount, importedList )
+        __writeFile( os.path.join( packageDirectory, moduleName + '.py' ), content )
+        moduleList.append( (packageName, moduleName, constantNames) )
+        relPathList.append( '%s/%s.py' % (packageName, moduleName) )
+
+    __writeFile( os.path.join( rootDirectory, MAIN_MODULE_NAME + '.py' ),
+                 __makeMain( moduleList ) )
+    relPathList.append( MAIN_MODULE_NAME + '.py' )
+    return relPathList
+
+def getProjectSize( rootDirectory ):
+    """
+    Returns the number of files and the total number of bytes in rootDirectory
+    """
+    fileCount, byteCount = 0, 0
+    for directory, _, fileNames in os.walk( rootDirectory ):
+        for fileName in fileNames:
+            fileCount += 1
+            byteCount += os.path.getsize( os.path.join( directory, fileName ) )
+    return fileCount, byteCount
+
+def __makeModule( generator, makeName, identifierCount, importedList ):
+    lines = [ '# -*- coding: utf-8 -*-', '"""', 'Generated module, do not edit', '"""' ]
+    lines += [ 'import %s' % (name,) for name in
+               generator.sample( STANDARD_IMPORTS, 3 ) ]
+    lines += [ 'from %s import %s' % (packageName, moduleName)
+               for packageName, moduleName, _ in importedList ]
+    lines.append( '' )
+
+    # Each class takes about 6 identifiers, each function 4 and each constant 1
+    classCount = max( 1, identifierCount // 24 )
+    functionCount = max( 1, identifierCount // 16 )
+    constantCount = max( 1, identifierCount - 6 * classCount - 4 * functionCount )
+
+    constantNames = [ makeName( 'CONST_' ).upper() for _ in range( constantCount ) ]
+    for constantName in constantNames:
+        lines.append( "%s = '%s'  # A constant" % (constantName, makeName()) )
+    lines.append( '' )
+
+    classNames = []
+    for _ in range( classCount ):
+        className = makeName().capitalize()
+        attributeName, otherAttributeName = makeName(), makeName()
+        methodName, argumentName = makeName(), makeName()
+        classNames.append( (className, methodName) )
+        lines += [
+            'class %s:' % (className,),
+            '    # A generated class',
+            '    def __init__( self, %s ):' % (argumentName,),
+            '        self.%s = %s' % (attributeName, argumentName),
+            "        self.%s = 'text with # no comment'" % (otherAttributeName,),
+            '',
+            '    def %s( self ):' % (methodName,),
+            '        return len( self.%s ) + len( self.%s )' % (attributeName, otherAttributeName),
+            ''
+        ]
+
+    functionNames = []
+    for _ in range( functionCount ):
+        functionName, argumentName, localName = makeName(), makeName(), makeName()
+        functionNames.append( functionName )
+        lines += [
+            'def %s( %s ):' % (functionName, argumentName),
+            '    """Generated function"""',
+            '    %s = [ %s ] * 2' % (localName, argumentName),
+            "    return '%%s: %%d' %% ( 'joined' ' parts', len( %s ) )" % (localName,),
+            ''
+        ]
+
+    entryLines = [ 'def run():', '    total = 0' ]
+    for className, methodName in classNames:
+        entryLines.append( "    total += %s( %s ).%s()" % (
+            className, generator.choice( constantNames ), methodName) )
+    for functionName in functionNames:
+        entryLines.append( "    total += len( %s( total ) )" % (functionName,) )
+    for _, moduleName, importedConstantNames in importedList:
+        entryLines.append( "    total += len( %s.%s )" % (moduleName, generator.choice( importedConstantNames )) )
+    entryLines.append( '    return total' )
+    return '\n'.join( lines + entryLines ) + '\n', constantNames
+
+def __makeMain( moduleList ):
+    lines = [ 'from %s import %s' % (packageName, moduleName)
+              for packageName, moduleName, _ in moduleList ]
+    lines += [ '', 'total = 0' ]
+    lines += [ 'total += %s.run()' % (moduleName,) for _, moduleName, _ in moduleList ]
+    lines.append( "print( 'Total: %d' % (total,) )" )
+    return '\n'.join( lines ) + '\n'
+
+def __writeFile( filePath, content ):
+    with open( filePath, 'w' ) as f:
+        f.write( content )
+
+if __name__ == '__main__':
+    if len( sys.argv ) < 3:
+        print( 'Usage: python synthetic_project.py <target directory> <number of modules> [<identifiers per module>]' )
+        sys.exit( 1 )
+    makeProject( sys.argv[1], int( sys.argv[2] ),
+                 int( sys.argv[3] ) if len( sys.argv ) > 3 else 50 )
@@ -0,0 +1,142 @@
+"""
+Persistent cache enabling incremental obfuscation
+
+The cache is stored in the target directory and records the name table and,
+per source file, the hash of its content together with everything phase 1
+derived from it.  On the next run, files with an unchanged hash need neither
+be read, nor prepared nor rewritten, while the names already in use by their
+obfuscated versions are retained.
+
+Moreover, per content hash, it records the outcome of parsing the content
+(see opy_parser.ParsedSource).  Since that only depends on the content, it
+survives changes of the settings or skip words, and the move of a file, so
+unchanged content is never parsed again.
+
+Watch mode keeps a cache in memory between its runs, only storing it if the
+incremental setting is on.
+
+N.B. The cache maps clear text words onto their obfuscated names,
+so never distribute it along with the obfuscated code!
+"""
+import os
+import json
+import codecs
+import hashlib
+
+try:
+    from . import opy_pipeline          # @UnusedImport
+except:
+    import opy_pipeline                 # @Reimport
+
+CACHE_FILE_NAME = '.opy_cache.json'
+CACHE_FORMAT    = 2
+
+def getContentHash( filePath ):
+    with open( filePath, 'rb' ) as f:
+        return hashlib.sha1( f.read() ).hexdigest()
+
+def getFingerprint( *parts ):
+    """
+    Summarizes everything other than the file contents that affects the output,
+    e.g. the opy version, the relevant settings and the skip words
+    """
+    return hashlib.sha1( repr( parts ).encode( 'utf-8' ) ).hexdigest()
+
+class CachedFile:
+    """
+    The phase 1 outcome of a source file as of its last obfuscation.
+    Has the same attributes as opy_pipeline.PreppedFile, bar the content.
+    """
+    def __init__( self, contentHash, obfusPath, sourceWordList=[],
+                  publicIdentifierSet=set(), obfuscatedModImports=set(),
+                  maskedIdentifiers=set() ):
+        self.contentHash          = contentHash
+        self.obfusPath            = obfusPath
+        self.sourceWordList       = list( sourceWordList )
+        self.publicIdentifierSet  = set( publicIdentifierSet )
+        self.obfuscatedModImports = set( obfuscatedModImports )
+        self.maskedIdentifiers    = set( maskedIdentifiers )
+
+    def toDict( self ):
+        return { "contentHash"          : self.contentHash
+               , "obfusPath"            : self.obfusPath
+               , "sourceWordList"       : self.sourceWordList
+               , "publicIdentifierSet"  : sorted( self.publicIdentifierSet )
+               , "obfuscatedModImports" : sorted( self.obfuscatedModImports )
+               , "maskedIdentifiers"    : sorted( self.maskedIdentifiers )
+               }
+
+    @staticmethod
+    def fromDict( d ):
+        return CachedFile( d["contentHash"], d["obfusPath"], d["sourceWordList"],
+                           d["publicIdentifierSet"], d["obfuscatedModImports"],
+                           d["maskedIdentifiers"] )
+
+class ObfuscationCache:
+    def __init__( self, targetRootDirectory ):
+        self.cacheFilePath      = '{0}/{1}'.format( targetRootDirectory, CACHE_FILE_NAME )
+        self.fingerprint        = None
+        self.obfuscatedWordList = []
+        self.fileDict           = {}    # clear text relative path -> CachedFile
+        self.parsedDict         = {}    # content hash -> opy_parser.ParsedSource.toDict ()
+        self.statHashDict       = {}    # source path -> ((modification time, size), content hash), in memory only
+
+    def getContentHash( self, filePath ):
+        """
+        Returns the hash of the content of filePath, only reading it if its modification time or size changed
+        since the hash was last taken by this cache object, as happens when it's kept in memory between runs
+        """
+        fileStat = os.stat( filePath )
+        stat = ( fileStat.st_mtime, fileStat.st_size )
+        statHash = self.statHashDict.get( filePath )
+        if statHash is None or statHash[0] != stat :
+            statHash = self.statHashDict[ filePath ] = ( stat, getContentHash( filePath ) )
+        return statHash[1]
+
+    def load( self ):
+        """
+        Returns False, leaving the cache empty, if there is no usable cache file
+        """
+        try:
+            with codecs.open( self.cacheFilePath, encoding='utf-8' ) as f:
+                d = json.load( f )
+            if d["format"] != CACHE_FORMAT : return False
+            self.fingerprint        = d["fingerprint"]
+            self.obfuscatedWordList = d["obfuscatedWordList"]
+            self.fileDict = dict( (clearRelPath, CachedFile.fromDict( fileDict ))
+                for clearRelPath, fileDict in d["files"].items() )
+            self.parsedDict         = d["parsed"]
+            return True
+        except Exception:
+            self.clear()
+            self.parsedDict = {}
+            return False
+
+    def clear( self ):
+        """
+        Forgets the names and files, but not the parse outcomes, which remain valid
+        """
+        self.fingerprint        = None
+        self.obfuscatedWordList = []
+        self.fileDict           = {}
+
+    def getReusable( self, clearRelPath, contentHash ):
+        """
+        Returns the CachedFile for an unchanged source whose obfuscated version still exists, else None
+        """
+        cachedFile = self.fileDict.get( clearRelPath )
+        if( cachedFile is None or cachedFile.contentHash != contentHash or
+            not os.path.isfile( cachedFile.obfusPath ) ): return None
+        return cachedFile
+
+    def save( self ):
+        d = { "format"             : CACHE_FORMAT
+            , "fingerprint"        : self.fingerprint
+            , "obfuscatedWordList" : self.obfuscatedWordList
+            , "files"              : dict( (clearRelPath, cachedFile.toDict())
+                for clearRelPath, cachedFile in self.fileDict.items() )
+            , "parsed"             : self.parsedDict
+            }
+        # Written to a temporary file of its own and then moved in place, so neither an interrupted
+        # run nor another run into the same target directory can leave a corrupt cache
+        opy_pipeline.writeFile( self.cacheFilePath, json.dumps( d ) )
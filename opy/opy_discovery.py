@@ -0,0 +1,162 @@
+"""
+Gathering the files of a source tree
+
+The skip_path_fragments and subset_files settings are compiled into a PathFilter,
+so each path is checked by a single regular expression search and set lookups,
+rather than by a scan over all entries.  Directories whose path already holds a
+skip fragment are pruned from the scan, so their contents aren't even listed.
+The files are found by threads and passed on as they're found, so that they can
+be processed while the scan is still in progress.
+
+Both settings may use the glob wildcards *, ? and [...].  In a skip fragment,
+* and ? don't match a /, so e.g. .egg-info/ may be written as *.egg-info/ and
+a fragment still matches anywhere in the path.  A subset entry should match a
+complete path or file name, so there * also matches a /.
+"""
+import os
+import re
+import fnmatch
+from six.moves import queue
+try:
+    import concurrent.futures as futures
+except ImportError: # Python 2 without the futures backport
+    futures = None
+
+scandir = getattr( os, 'scandir', None )    # Python 3.5 and later
+
+GLOB_CHARS           = '*?['
+DEFAULT_THREAD_COUNT = 8    # Directory listing mostly waits for the file system
+
+def isGlob( pattern ):
+    return any( char in pattern for char in GLOB_CHARS )
+
+def compileFragments( fragments ):
+    """
+    Returns a regular expression searching for any of fragments, or None if there are none
+    """
+    if not fragments : return None
+    return re.compile( '|'.join( __translateFragment( fragment ) for fragment in fragments ) )
+
+def __translateFragment( fragment ):
+    pieces = []
+    index = 0
+    while index < len( fragment ):
+        char = fragment[ index ]
+        index += 1
+        if char == '*' : pieces.append( '[^/]*' )
+        elif char == '?' : pieces.append( '[^/]' )
+        elif char == '[' :
+            # as with fnmatch, a ] right after the [ or [! is part of the set
+            start = index + 1 if fragment[ index:index + 1 ] == '!' else index
+            end = fragment.find( ']', start + 1 )
+            if end < 0 : pieces.append( re.escape( char ) )
+            else :
+                charSet = fragment[ index:end ].replace( '\\', '\\\\' )
+                if charSet.startswith( '!' ) : charSet = '^' + charSet[ 1: ]
+                pieces.append( '[%s]' % (charSet,) )
+                index = end + 1
+        else : pieces.append( re.escape( char ) )
+    return ''.join( pieces )
+
+class PathFilter:
+    """
+    Decides which files are gathered, by skip_path_fragments and, if not empty, subset_files.
+    Paths should use forward slashes.
+    """
+    def __init__( self, skipPathFragments=[], subsetFiles=[] ):
+        self.skipRegEx       = compileFragments( skipPathFragments )
+        self.hasSubset       = len( subsetFiles ) > 0
+        self.subsetFileSet   = set( [ subsetFile for subsetFile in subsetFiles
+                                      if not isGlob( subsetFile ) ] )
+        self.subsetGlobList  = [ subsetFile for subsetFile in subsetFiles
+                                 if isGlob( subsetFile ) ]
+
+    def isSkippedDirectory( self, directory ):
+        # any fragment in the directory is in the path of each of its files
+        return ( self.skipRegEx is not None and
+                 self.skipRegEx.search( directory + '/' ) is not None )
+
+    def isKept( self, filePath ):
+        if self.skipRegEx is not None and self.skipRegEx.search( filePath ) :
+            return False
+        if not self.hasSubset : return True
+        baseName = filePath.rsplit( '/', 1 )[ -1 ]
+        if filePath in self.subsetFileSet or baseName in self.subsetFileSet :
+            return True
+        for subsetGlob in self.subsetGlobList :
+            if( fnmatch.fnmatchcase( filePath, subsetGlob ) or
+                fnmatch.fnmatchcase( baseName, subsetGlob ) ) : return True
+        return False
+
+def scanFiles( rootDirectory, pathFilter, threadCount=DEFAULT_THREAD_COUNT ):
+    """
+    Yields the paths of the files in rootDirectory kept by pathFilter as soon as they're found, 
+    in no particular order and without descending into skipped directories.
+    The top level directories are scanned in parallel by a pool of threads, so that waiting for
+    e.g. a network file system overlaps with processing the files found so far.
+    """
+    rootDirectory = rootDirectory.replace( '\\', '/' )
+    subDirectories = []
+    for filePath, isDirectory, isLink in __listDirectory( rootDirectory ) :
+        if isDirectory : 
+            if not isLink and not pathFilter.isSkippedDirectory( filePath ) : 
+                subDirectories.append( filePath )
+        elif pathFilter.isKept( filePath ) : yield filePath
+
+    if futures is None or threadCount < 2 or len( subDirectories ) < 2 :
+        for subDirectory in subDirectories :
+            for filePath in __scanTree( subDirectory, pathFilter ) : yield filePath
+        return
+
+    # each thread scans a tree, passing the paths it finds, or an 
+    # exception, through a queue, and ending with a None
+    foundQueue = queue.Queue()
+    def scanTree( directory ):
+        try:
+            for filePath in __scanTree( directory, pathFilter ) : 
+                foundQueue.put( filePath )
+        except Exception as exception:
+            foundQueue.put( exception )
+        foundQueue.put( None )
+
+    executor = futures.ThreadPoolExecutor( min( threadCount, len( subDirectories ) ) )
+    try:
+        for subDirectory in subDirectories : executor.submit( scanTree, subDirectory )
+        runningCount = len( subDirectories )
+        while runningCount > 0 :
+            found = foundQueue.get()
+            if found is None : runningCount -= 1
+            elif isinstance( found, Exception ) : raise found
+            else : yield found
+    finally:
+        executor.shutdown( wait=True )
+
+def __scanTree( directory, pathFilter ):
+    # like os.walk, doesn't follow symbolic links to directories
+    directories = [ directory ]
+    while directories :
+        for filePath, isDirectory, isLink in __listDirectory( directories.pop() ) :
+            if isDirectory : 
+                if not isLink and not pathFilter.isSkippedDirectory( filePath ) : 
+                    directories.append( filePath )
+            elif pathFilter.isKept( filePath ) : yield filePath
+
+def __listDirectory( directory ):
+    # returns (path, is a directory, is a symbolic link) triples, a symbolic link
+    # to a directory being neither a file nor followed, and the directories that 
+    # can't be listed being ignored, like os.walk does
+    try:
+        if scandir is None :  # Python 2
+            return [ ( filePath, os.path.isdir( filePath ), os.path.islink( filePath ) ) 
+                     for filePath in [ '{0}/{1}'.format( directory, fileName ) 
+                                       for fileName in os.listdir( directory ) ] ]
+        entryList = []
+        for entry in scandir( directory ) :
+            try: isDirectory = entry.is_dir()
+            except OSError : isDirectory = False
+            try: isLink = entry.is_symlink()
+            except OSError : isLink = False
+            entryList.append( ( '{0}/{1}'.format( directory, entry.name ), isDirectory, isLink ) )
+        return entryList
+    except OSError :
+        return []
@@ -0,0 +1,177 @@
+"""
+Single pass lexer for the comments and string literals of Python source code
+
+It's based on the tokenize module, so unlike the regular expressions it
+replaces, it isn't fooled by e.g. a # or doubled quotes inside a string.
+
+Of an f-string only the literal text is reported, including the string
+literals nested in its replacement fields.  The expressions in those fields
+remain code, so the names in them are obfuscated like any other name.
+"""
+import io
+import tokenize
+
+COMMENT, STRING, STRINGS, FSTRING_TEXT = range( 4 )     # STRINGS are implicitly concatenated string literals
+
+stringPrefixChars = 'rRuUbBfF'
+tripleQuotes = ('"""', "'''")
+pep8CommentIndent = '  '
+pep8CommentStart = '# '
+
+FSTRING_START = getattr( tokenize, 'FSTRING_START', None )  # Python 3.12 and up tokenize f-strings piecewise
+FSTRING_END = getattr( tokenize, 'FSTRING_END', None )
+
+def findLiterals( content, pep8Comments=False ):
+    """
+    Returns the (kind, start, end) offsets of the comments and string literals in content, in order of appearance,
+    or None if content can't be tokenized, e.g. because it isn't valid Python.
+    With pep8Comments, only inline comments of the form <blank><blank>#<blank> are reported, including both blanks.
+    """
+    lineOffsetList = [0]
+    for line in content.split( '\n' ):
+        lineOffsetList.append( lineOffsetList[-1] + len( line ) + 1 )
+
+    def getOffset( position ):
+        return lineOffsetList[position[0] - 1] + position[1]
+
+    literalList = []
+    previousToken = None
+    isAfterString = False       # The last literal is a string, possibly to be concatenated with the next one
+    isAfterFString = False      # Idem an f-string, whose concatenated strings can't be scrambled either
+    pendingCommentList = []     # Comments after a string, part of the concatenation if another string follows
+    fStringStart = None
+    fStringDepth = 0
+    try:
+        for token in tokenize.generate_tokens( io.StringIO( content ).readline ):
+            tokenType, tokenString, start, end, line = token[:5]
+            if FSTRING_START is not None and tokenType == FSTRING_START:
+                if not fStringDepth:
+                    fStringStart = getOffset( start )
+                    if isAfterString:
+                        literalList[-1] = (FSTRING_TEXT,) + literalList[-1][1:]
+                    literalList.extend( pendingCommentList )
+                    pendingCommentList = []
+                    isAfterString = False
+                fStringDepth += 1
+            elif FSTRING_END is not None and tokenType == FSTRING_END:
+                fStringDepth -= 1
+                if not fStringDepth:
+                    literalList.extend( __findFStringLiterals( content, fStringStart, getOffset( end ) ) )
+                    isAfterFString = True
+            elif fStringDepth:
+                pass
+            elif tokenType == tokenize.COMMENT:
+                commentList = pendingCommentList if isAfterString else literalList
+                if not pep8Comments:
+                    commentList.append( (COMMENT, getOffset( start ), getOffset( end )) )
+                elif line[:start[1]].endswith( pep8CommentIndent ) and tokenString.startswith( pep8CommentStart ):
+                    commentList.append( (COMMENT, getOffset( start ) - len( pep8CommentIndent ), getOffset( end )) )
+            elif tokenType == tokenize.STRING:
+                stringStart = getOffset( start )
+                if (                                                    # A prefix unknown to this Python version, e.g. ur in Python 3,
+                    previousToken and previousToken[0] == tokenize.NAME and    # is tokenized as a separate name
+                    previousToken[3] == start and not previousToken[1].strip( stringPrefixChars )
+                ):
+                    stringStart = getOffset( previousToken[2] )
+                stringEnd = getOffset( end )
+                string = content[ stringStart:stringEnd ]
+                if 'f' in string[:len( string ) - len( string.lstrip( stringPrefixChars ) )].lower():
+                    if isAfterString:   # Kept as it is, like the f-string it's concatenated with
+                        literalList[-1] = (FSTRING_TEXT,) + literalList[-1][1:]
+                    literalList.extend( pendingCommentList )
+                    pendingCommentList = []
+                    literalList.extend( __findFStringLiterals( content, stringStart, stringEnd ) )
+                    isAfterString = False
+                    isAfterFString = True
+                elif isAfterFString:
+                    literalList.append( (FSTRING_TEXT, stringStart, stringEnd) )
+                elif isAfterString:     # Reported as a whole, since the literals can only be scrambled together, including the comments in between
+                    literalList[-1] = (STRINGS, literalList[-1][1], stringEnd)
+                    pendingCommentList = []
+                else:
+                    literalList.append( (STRING, stringStart, stringEnd) )
+                    isAfterString = True
+            elif tokenType == tokenize.ERRORTOKEN and tokenString.strip():
+                return None     # E.g. an unterminated string, better leave that to the regular expressions
+            if not (tokenType in (tokenize.STRING, tokenize.NL, tokenize.COMMENT) or fStringDepth or tokenType == FSTRING_END):
+                isAfterString = False
+                isAfterFString = False
+                literalList.extend( pendingCommentList )
+                pendingCommentList = []
+            previousToken = token
+    except (tokenize.TokenError, SyntaxError):
+        return None
+    return literalList
+
+def __findFStringLiterals( content, start, end ):
+    # Everything in an f-string but the expressions in its replacement fields, plus the literals nested in those expressions
+    text = content[ start:end ]
+    prefixLength = len( text ) - len( text.lstrip( stringPrefixChars ) )
+    quoteLength = 3 if text[ prefixLength:prefixLength + 3 ] in tripleQuotes else 1
+
+    codeSpanList = []
+    __findFieldCode( text, prefixLength + quoteLength, len( text ) - quoteLength, codeSpanList )
+
+    # The { before and the delimiter after each expression aren't part of the literal text,
+    # so the expression remains delimited from the placeholders standing for that text
+    literalList = []
+    literalStart = 0
+    for codeStart, codeEnd in codeSpanList:
+        literalList.append( (FSTRING_TEXT, start + literalStart, start + codeStart - 1) )
+        nestedLiteralList = findLiterals( '(' + text[ codeStart:codeEnd ] + ')' )  # Parenthesized, since it may span lines
+        if nestedLiteralList is None:
+            return [(FSTRING_TEXT, start, end)]
+        for kind, nestedStart, nestedEnd in nestedLiteralList:
+            literalList.append( (FSTRING_TEXT, start + codeStart + nestedStart - 1, start + codeStart + nestedEnd - 1) )
+        literalStart = codeEnd + 1
+    literalList.append( (FSTRING_TEXT, start + literalStart, end) )
+    return [literal for literal in literalList if literal[1] < literal[2]]
+
+def __findFieldCode( text, index, bodyEnd, codeSpanList ):
+    # Registers the expressions of the replacement fields in text [index:bodyEnd]
+    # Returns the index of the } that ends a format spec, or else bodyEnd
+    while index < bodyEnd:
+        char = text[index]
+        if char in '{}' and text[ index + 1:index + 2 ] == char:  # Escaped brace
+            index += 2
+        elif char == '{':
+            index = __findFieldEnd( text, index + 1, bodyEnd, codeSpanList )
+        elif char == '}':
+            return index
+        else:
+            index += 1
+    return bodyEnd
+
+def __findFieldEnd( text, index, bodyEnd, codeSpanList ):
+    # Registers the expression of the replacement field starting at index and returns the index just after the field
+    codeStart = index
+    depth = 0
+    while index < bodyEnd:
+        char = text[index]
+        if char in '\'"':   # Braces, colons etc. in a nested string don't count
+            quote = text[ index:index + 3 ] if text[ index:index + 3 ] in tripleQuotes else char
+            index = text.find( quote, index + len( quote ) )
+            index = bodyEnd if index < 0 else index + len( quote )
+            continue
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            if not depth:
+                break
+            depth -= 1
+        elif not depth and (
+            (char == '!' and text[ index + 1:index + 2 ] != '=') or
+            char == ':' or
+            (char == '=' and text[index - 1] not in '=!<>' and text[ index + 1: ].lstrip()[:1] in ('!', ':', '}'))   # Self documenting
+        ):
+            break
+        index += 1
+    codeSpanList.append( (codeStart, index) )
+
+    while index < bodyEnd and text[index] not in '!:}':   # Past the = of a self documenting expression
+        index += 1
+    if text[ index:index + 1 ] == '!':     # Conversion
+        index += 2
+    if text[ index:index + 1 ] == ':':     # Format spec, possibly holding fields itself
+        index = __findFieldCode( text, index + 1, bodyEnd, codeSpanList )
+    return index + 1
@@ -0,0 +1,170 @@
+"""
+The table of obfuscated names
+
+Each source word to be obfuscated is numbered in order of addition, and its
+obfuscated name is derived from that number.  The words are kept once, interned,
+in a list by number, with a dict from word to number, so looking up e.g. a module
+or directory name takes a single dict lookup rather than a scan over all words.
+The names themselves are only generated when first asked for and then kept in a
+list by number, so a run that only analyzes generates none of them.  The dict
+from name back to word is likewise built on first use.
+
+The name scheme determines how names are derived from numbers:
+  binary     The number written in binary with l's for 0's, e.g. l1ll1
+  frequency  The shortest names, a, b, ..., z, aa, ab, ..., skipping any clear word,
+             while the words are numbered from the most to the least frequent
+Both keep a leading _ or __ of the word, since it matters to Python, and end in the name tail.
+The frequency scheme only uses lower case letters and digits, so file and directory
+names named after words can't clash on file systems that ignore case.
+"""
+from six.moves import intern
+
+BINARY, FREQUENCY = nameSchemes = ('binary', 'frequency')
+
+SHORT_NAME_HEADS = 'abcdefghijklmnopqrstuvwxyz'
+SHORT_NAME_TAILS = SHORT_NAME_HEADS + '0123456789'
+
+def getNamePrefix( word ):
+    return '__' if word.startswith( '__' ) else '_' if word.startswith( '_' ) else ''
+
+def getObfuscatedName( index, word, nameTail ):
+    return '{0}{1}{2}'.format(
+        getNamePrefix( word ) or 'l', bin( index )[ 2: ].replace( '0', 'l' ), nameTail
+    )
+
+def getShortName( number ):
+    """
+    Returns the number-th identifier of SHORT_NAME_HEADS and SHORT_NAME_TAILS, shortest first
+    """
+    length = 1
+    count = len( SHORT_NAME_HEADS )
+    while number >= count :
+        number -= count
+        length += 1
+        count *= len( SHORT_NAME_TAILS )
+    chars = []
+    for _ in range( length - 1 ) :
+        number, tailIndex = divmod( number, len( SHORT_NAME_TAILS ) )
+        chars.append( SHORT_NAME_TAILS[ tailIndex ] )
+    chars.append( SHORT_NAME_HEADS[ number ] )
+    return ''.join( reversed( chars ) )
+
+class NameTable:
+    """
+    Maps the source words to be obfuscated to their obfuscated names and back.
+    Words can only be added, so the number and name of a word never change.
+    The frequency scheme skips the names in clearWordSet, the words that stay in clear text.
+    """
+    def __init__( self, nameTail, wordList=[], scheme=BINARY, clearWordSet=frozenset() ):
+        self.nameTail       = nameTail
+        self.scheme         = scheme
+        self.clearWordSet   = clearWordSet
+        self.wordList       = []        # Number -> word
+        self.indexDict      = {}        # Word -> number
+        self.nameList       = []        # Number -> name, None until asked for
+        self.wordByNameDict = None      # Name -> word, built on first use
+        self.pendingWordList    = []    # Counted words not numbered yet, in order of first appearance
+        self.pendingCountDict   = {}    # Their number of occurrences
+        self.namedCount         = 0     # Words named so far, frequency scheme only
+        self.shortNameCount     = 0     # Short names handed out or skipped so far, idem
+        self.update( wordList )
+
+    def __len__( self ):
+        return len( self.wordList )
+
+    def __contains__( self, word ):
+        return word in self.indexDict
+
+    def __iter__( self ):
+        return iter( self.wordList )
+
+    def add( self, word ):
+        """
+        Numbers word, if it isn't in the table yet, and returns its number
+        """
+        index = self.indexDict.get( word )
+        if index is None :
+            index = len( self.wordList )
+            if type( word ) is str :    # Python 2 can't intern the unicode words
+                word = intern( word )
+            self.indexDict[ word ] = index
+            self.wordList.append( word )
+            self.nameList.append( None )
+            if self.wordByNameDict is not None :
+                self.wordByNameDict[ self.getNameByIndex( index ) ] = word
+        return index
+
+    def update( self, words ):
+        for word in words : self.add( word )
+
+    def count( self, word, occurrences=1 ):
+        """
+        Counts occurrences of word, to be numbered by addCounted if it isn't in the table yet
+        """
+        if word in self.indexDict : return
+        if word in self.pendingCountDict :
+            self.pendingCountDict[ word ] += occurrences
+        else :
+            self.pendingCountDict[ word ] = occurrences
+            self.pendingWordList.append( word )
+
+    def addCounted( self ):
+        """
+        Numbers the counted words, in order of first appearance or, with the frequency scheme,
+        from the most to the least frequent, so the most frequent words get the shortest names
+        """
+        pendingWordList = self.pendingWordList
+        if self.scheme == FREQUENCY :
+            pendingCountDict = self.pendingCountDict
+            pendingWordList = sorted( pendingWordList,  # Stable, so equally frequent words stay in order
+                                      key=lambda word: -pendingCountDict[ word ] )
+        self.update( pendingWordList )
+        self.pendingWordList = []
+        self.pendingCountDict = {}
+
+    def getIndex( self, word ):
+        return self.indexDict.get( word )
+
+    def getNameByIndex( self, index ):
+        name = self.nameList[ index ]
+        if name is None :
+            if self.scheme == FREQUENCY :
+                # Which short names are skipped depends on the earlier ones, so they're generated in order
+                while self.namedCount <= index :
+                    self.nameList[ self.namedCount ] = self.__getNextShortName( self.wordList[ self.namedCount ] )
+                    self.namedCount += 1
+                name = self.nameList[ index ]
+            else :
+                name = self.nameList[ index ] = getObfuscatedName(
+                    index, self.wordList[ index ], self.nameTail )
+        return name
+
+    def __getNextShortName( self, word ):
+        prefix = getNamePrefix( word )
+        while True :
+            name = '{0}{1}{2}'.format( prefix, getShortName( self.shortNameCount ), self.nameTail )
+            self.shortNameCount += 1
+            if not name in self.clearWordSet : return name
+
+    def getName( self, word, default=None ):
+        """
+        Returns the obfuscated name of word, or default if word isn't obfuscated
+        """
+        index = self.indexDict.get( word )
+        return default if index is None else self.getNameByIndex( index )
+
+    def getWord( self, name, default=None ):
+        """
+        Returns the source word obfuscated to name, or default if there's none
+        """
+        if self.wordByNameDict is None :
+            self.wordByNameDict = dict( ( self.getNameByIndex( index ), word )
+                                        for index, word in enumerate( self.wordList ) )
+        return self.wordByNameDict.get( name, default )
+
+    def getNameDict( self ):
+        """
+        Returns a dict from each word to its name, as used to rewrite the sources
+        """
+        return dict( ( word, self.getNameByIndex( index ) )
+                     for index, word in enumerate( self.wordList ) )
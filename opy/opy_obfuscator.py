@@ -0,0 +1,806 @@
+"""
+Reusable obfuscation engine
+
+An Obfuscator reads its configuration once and keeps everything derived
+from it: the compiled regular expressions, the skip words of the builtins
+and external modules and the name table of its last run.  It can therefore
+obfuscate any number of times in the same process, without reloading opy.
+
+Each Obfuscator runs one obfuscation at a time, while separate Obfuscators
+may run concurrently in separate threads.  Since cProfile and tracemalloc are
+process wide, only one run at a time profiles with them, the concurrent runs
+asking for that as well proceed unprofiled after a warning.
+"""
+import os
+import sys
+import json
+import time
+import keyword
+import cProfile
+import posixpath
+import threading
+import collections
+
+isPython2 = sys.version_info [0] == 2
+
+try:
+    from . import opy_pipeline          # @UnusedImport
+    from . import opy_parser            # @UnusedImport
+    from . import opy_cache             # @UnusedImport
+    from . import opy_discovery         # @UnusedImport
+    from . import opy_names             # @UnusedImport
+    from . import opy_skip_index        # @UnusedImport
+    from . _version import __version__  # @UnusedImport
+except:
+    import opy_pipeline                 # @Reimport
+    import opy_parser                   # @Reimport
+    import opy_cache                    # @Reimport
+    import opy_discovery                # @Reimport
+    import opy_names                    # @Reimport
+    import opy_skip_index               # @Reimport
+    from _version import __version__    # @Reimport
+
+programName = 'opy'
+
+PROFILE_STEPS, PROFILE_CPROFILE, PROFILE_TRACEMALLOC = profileKinds = ('steps', 'cprofile', 'tracemalloc')
+PROFILE_FILE_PRE_NAME = '{0}_profile'.format (programName)
+DEFAULT_WATCH_INTERVAL = 0.5    # Seconds between checks for changed sources
+
+processProfileLock = threading.Lock ()  # Held by the run profiling with cProfile or tracemalloc, which are process wide
+
+def printBanner ():
+    print ('{} (TM) Configurable Multi Module Python Obfuscator Version {}'.format (programName.capitalize (), __version__))
+    print ('Copyright (C) Geatec Engineering. License: Apache 2.0 at  http://www.apache.org/licenses/LICENSE-2.0\n')
+
+class FileStats:
+    """
+    What a run did with a single source file
+    """
+    def __init__ (self, obfusPath, bytesIn = 0, bytesOut = 0, prepSeconds = 0.0, rewriteSeconds = 0.0, isReused = False, isWritten = False,
+                  stepSecondsDict = {}, counterDict = {}):
+        self.obfusPath          = obfusPath
+        self.bytesIn            = bytesIn
+        self.bytesOut           = bytesOut
+        self.prepSeconds        = prepSeconds
+        self.rewriteSeconds     = rewriteSeconds
+        self.isReused           = isReused      # Taken over unchanged from a previous incremental run
+        self.isWritten          = isWritten     # False if the obfuscated file already held this content
+        self.stepSecondsDict    = dict (stepSecondsDict)    # Seconds per step within prepare and rewrite, only when profiling steps
+        self.counterDict        = dict (counterDict)        # Counts of e.g. literals, words and substitutions, idem
+
+    def toDict (self):
+        return dict (self.__dict__)
+
+class OpyResults:
+    """
+    The outcome of a run, including statistics, convertible to a dict or JSON for further processing
+    """
+    def __init__ (self):
+        self.obfuscatedFileDict     = None      # Clear text relative path -> obfuscated path
+        self.obfuscatedWordList     = None
+        self.nameTable              = None      # opy_names.NameTable, from word to obfuscated name and back
+        self.obfuscatedModImports   = None
+        self.maskedIdentifiers      = None
+        self.skippedPublicSet       = None
+        self.fileStatsDict          = {}        # Clear text relative path -> FileStats
+        self.assetFileCount         = 0         # Other files, copied rather than obfuscated
+        self.skipWordCount          = 0
+        self.phaseSecondsDict       = collections.OrderedDict ()
+        self.totalSeconds           = 0.0
+        self.isDryRun               = False
+        self.isAnalysis             = False     # Only the names were determined, nothing was rewritten
+        self.obfuscatedContentList  = []        # (obfuscated relative path, content) pairs of an in memory run without a sink
+
+    def getReusedFileCount (self):
+        return len ([fileStats for fileStats in self.fileStatsDict.values () if fileStats.isReused])
+
+    def getWrittenFileCount (self):
+        return len ([fileStats for fileStats in self.fileStatsDict.values () if fileStats.isWritten])
+
+    def getBytesIn (self):
+        return sum ([fileStats.bytesIn for fileStats in self.fileStatsDict.values ()])
+
+    def getBytesOut (self):
+        return sum ([fileStats.bytesOut for fileStats in self.fileStatsDict.values ()])
+
+    def toDict (self):
+        return {
+            'obfuscatedFileDict': self.obfuscatedFileDict,
+            'obfuscatedWordList': self.obfuscatedWordList,
+            'obfuscatedModImports': sorted (self.obfuscatedModImports),
+            'maskedIdentifiers': sorted (self.maskedIdentifiers),
+            'skippedPublicSet': sorted (self.skippedPublicSet),
+            'fileStatsDict': dict ((clearRelPath, fileStats.toDict ()) for clearRelPath, fileStats in self.fileStatsDict.items ()),
+            'assetFileCount': self.assetFileCount,
+            'skipWordCount': self.skipWordCount,
+            'phaseSecondsDict': self.phaseSecondsDict,
+            'totalSeconds': self.totalSeconds,
+            'isDryRun': self.isDryRun,
+            'isAnalysis': self.isAnalysis
+        }
+
+    def toJson (self, **kwargs):
+        # The keyword arguments are passed on to json.dumps, e.g. indent = 4
+        return json.dumps (self.toDict (), **kwargs)
+
+    def getSummary (self):
+        return '\n'.join ([
+            'Analyzed {0} files, {1} bytes'.format (len (self.fileStatsDict), self.getBytesIn ()) if self.isAnalysis else
+            '{0} {1} files, {2} bytes into {3} bytes, {4} written, {5} reused, {6} other files copied'.format (
+                'Analyzed' if self.isDryRun else 'Obfuscated', len (self.fileStatsDict), self.getBytesIn (), self.getBytesOut (),
+                self.getWrittenFileCount (), self.getReusedFileCount (), self.assetFileCount
+            ),
+            'Words: {0} obfuscated, {1} skipped, of which {2} public identifiers'.format (
+                len (self.obfuscatedWordList), self.skipWordCount, len (self.skippedPublicSet)
+            ),
+            'Imports: {0} obfuscated modules, {1} masked identifiers'.format (
+                len (self.obfuscatedModImports), len (self.maskedIdentifiers)
+            ),
+            'Seconds: {0}, total {1:.3f}'.format (
+                ', '.join (['{0} {1:.3f}'.format (phaseName, seconds) for phaseName, seconds in self.phaseSecondsDict.items ()]),
+                self.totalSeconds
+            )
+        ])
+
+class OpyHooks:
+    """
+    Receives measurements while a run progresses, e.g. to forward them to a metrics system.
+    Override any of the methods, which by default do nothing.
+    """
+    def onPhase (self, phaseName, seconds):
+        pass
+
+    def onFile (self, clearRelPath, fileStats):
+        pass
+
+    def onRun (self, results):
+        pass
+
+class Obfuscator:
+    """
+    Obfuscates source trees according to the configuration it was created with,
+    given either as an OpyConfig or as the path of a config file.
+    Jobs, if given, overrides the jobs setting of the configuration.
+    Hooks, if given, is an OpyHooks object receiving the measurements of each run.
+    """
+    def __init__ (self, configSettings = None, configFilePath = None, jobs = None, hooks = None):
+        # =========== Read config file
+
+        if configSettings is not None:
+            self.configFilePath = ''
+            configFile = configSettings.toVirtualFile ()
+        else:
+            self.configFilePath = configFilePath.replace ('\\', '/')
+            configFile = open (self.configFilePath)
+
+        configNamespace = {}
+        exec (configFile.read (), configNamespace)
+        configFile.close ()
+
+        def getConfig (parameter, default):
+            try:
+                return eval (parameter, configNamespace)
+            except:
+                return default
+
+        self.obfuscateStrings = getConfig ('obfuscate_strings', False)
+        self.asciiStrings = getConfig ('ascii_strings', False)
+        self.obfuscatedNameTail = getConfig ('obfuscated_name_tail', '_{}_')
+        self.plainMarker = getConfig ('plain_marker', '_{}_'.format (programName))
+        self.pep8Comments = getConfig ('pep8_comments', True)
+        self.sourceFileNameExtensionList = getConfig ('source_extensions.split ()', ['py', 'pyx'])
+        self.skipFileNameExtensionList = getConfig ('skip_extensions.split ()', ['pyc'])
+        self.skipPathFragmentList = getConfig ('skip_path_fragments.split ()', [])
+        self.externalModuleNameList = getConfig ('external_modules.split ()', [])
+        self.maskExternalModules = getConfig ('mask_external_modules', False)
+        self.skipPublicIdentifiers = getConfig ('skip_public', False)
+        self.plainFileRelPathList = getConfig ('plain_files.split ()', [])
+        self.extraPlainWordList = getConfig ('plain_names.split ()', [])
+        self.dryRun = getConfig ('dry_run', False)
+        self.preppedOnly = getConfig ('prepped_only', False)
+        self.subsetFilesList = getConfig ('subset_files.split ()', [])
+        self.jobs = getConfig ('jobs', 1)
+        self.incremental = getConfig ('incremental', False)
+        self.useSkipIndex = getConfig ('skip_index', False)
+        self.skipIndexDirectory = getConfig ('skip_index_directory', '')
+        self.staticExternalModules = getConfig ('static_external_modules', False)
+        self.sharedUnScrambler = getConfig ('shared_unscrambler', False)
+        self.assetCopyMode = getConfig ('asset_copy_mode', opy_pipeline.COPY)
+        if not self.assetCopyMode in opy_pipeline.assetCopyModes:
+            print ('Warning: unknown asset_copy_mode {0}, copying files instead'.format (self.assetCopyMode))
+            self.assetCopyMode = opy_pipeline.COPY
+        self.nameScheme = getConfig ('name_scheme', opy_names.BINARY)
+        if not self.nameScheme in opy_names.nameSchemes:
+            print ('Warning: unknown name_scheme {0}, using {1} names instead'.format (self.nameScheme, opy_names.BINARY))
+            self.nameScheme = opy_names.BINARY
+        if jobs is not None:
+            self.jobs = jobs
+
+        # Profiling can also be switched on without touching the configuration, by the OPY_PROFILE environment variable
+        self.profileList = getConfig ('profile.split ()', []) + os.environ.get ('OPY_PROFILE', '') .replace (',', ' ') .split ()
+        for profileKind in self.profileList:
+            if not profileKind in profileKinds:
+                print ('Warning: unknown profile {0}, choose from {1}'.format (profileKind, ', '.join (profileKinds)))
+        self.profileDirectory = getConfig ('profile_directory', '') or os.getcwd ()
+        self.hooks = hooks or OpyHooks ()
+
+        #TODO: Handle spaces between key/colon/value, e.g. 'key : value'
+        self.replacementModulesDict = {}
+        replacementModulesPairList = getConfig ('replacement_modules.split ()', [])
+        for pair in replacementModulesPairList:
+            pairParts = pair.split(":")
+            try: self.replacementModulesDict[ pairParts[0].strip() ]= pairParts[1].strip()
+            except: continue
+
+        # =========== Define comment, string and identifier recognition tools, shared by all files and runs
+
+        self.fileContext = opy_pipeline.FileContext (
+            plainMarker             = self.plainMarker,
+            obfuscateStrings        = self.obfuscateStrings,
+            pep8Comments            = self.pep8Comments,
+            skipPublicIdentifiers   = self.skipPublicIdentifiers,
+            preppedOnly             = self.preppedOnly,
+            replacementModulesDict  = self.replacementModulesDict,
+            maskExternalModules     = self.maskExternalModules,
+            externalModuleNameList  = self.externalModuleNameList,
+            sharedUnScrambler       = self.sharedUnScrambler
+        )
+
+        self.skipIndex = opy_skip_index.SkipIndex (
+            self.skipIndexDirectory if self.useSkipIndex else None, self.plainMarker, self.staticExternalModules
+        )
+        self.externalSkipWordSet = None     # Collected on first use, then kept
+
+        # =========== Outcome of the last run, its name table is retained by the next run on the same directories
+
+        self.obfuscatedFileDict = {}
+        self.obfuscatedWordList = []
+        self.nameTable = opy_names.NameTable (self.obfuscatedNameTail, scheme = self.nameScheme)
+        self.obfuscatedModImports = set ()
+        self.maskedIdentifiers = set ()
+        self.skippedPublicSet = set ()
+        self.skipWordList = []
+        self.__lastRunKey = None
+
+        self.__runLock = threading.Lock ()
+
+    def getObfuscatedName (self, obfuscationIndex, name):
+        return opy_names.getObfuscatedName (obfuscationIndex, name, self.obfuscatedNameTail)
+
+    def getExternalSkipWordSet (self, refresh = False):
+        """
+        The keywords and the identifiers of the builtins and external modules, which should never be obfuscated
+        """
+        if self.externalSkipWordSet is None or refresh:
+            externalSkipWordSet = set (keyword.kwlist + ['__init__'] + self.extraPlainWordList)   # __init__ should be in, since __init__.py is special
+            if not isPython2: externalSkipWordSet.update( ['unicode', 'unichr' ] ) # not naturally kept in clear text when obfuscation is produced in Python 3
+            for externalModuleName in [opy_skip_index.BUILTINS_MODULE_NAME] + self.externalModuleNameList:
+                externalSkipWordSet.update (self.skipIndex.getNames (externalModuleName, refresh = refresh))
+            self.externalSkipWordSet = externalSkipWordSet
+        return self.externalSkipWordSet
+
+    def warmSkipIndex (self):
+        """
+        (Re)builds the skip index for the builtins and external modules, even if the configuration doesn't use it
+        """
+        if self.skipIndex.indexDirectory is None:
+            self.skipIndex = opy_skip_index.SkipIndex (self.skipIndexDirectory, self.plainMarker, self.staticExternalModules)
+        self.getExternalSkipWordSet (refresh = True)
+        print ('Skip index warmed in {0}'.format (self.skipIndex.indexDirectory))
+
+    def obfuscate (self, sourceRootDirectory = None, targetRootDirectory = None):
+        """
+        Obfuscates the source tree in sourceRootDirectory, by default the current directory, into targetRootDirectory,
+        by default a sibling of it with _opy appended to its name
+        """
+        return self.__run (sourceRootDirectory, targetRootDirectory, self.subsetFilesList, self.dryRun, incremental = self.incremental)
+
+    def analyze (self, sourceRootDirectory = None, fileList = []):
+        """
+        Determines the obfuscation of the files in fileList, without writing anything.
+        Only collects the words, imports and public identifiers of the files, so the obfuscated contents aren't
+        produced and the file statistics hold no output sizes. Use the dry_run setting to get those too.
+        """
+        return self.__run (sourceRootDirectory, None, fileList, True, analyzeOnly = True)
+
+    def obfuscateFiles (self, files, sink = None):
+        """
+        Obfuscates files held in memory rather than on disk, e.g. read from a wheel or a git object store.
+        Files is a dict or an iterable of (relative path, content) pairs, the content being text or UTF-8 bytes.
+        Each outcome is passed to sink (obfuscated relative path, content) as soon as it's ready, e.g. to add it
+        to an archive, with the content of obfuscated files as UTF-8 bytes and that of other files as supplied.
+        Without a sink, the pairs are collected in the obfuscatedContentList of the returned OpyResults.
+        """
+        fileContentDict = {}
+        for relPath, content in (files.items () if hasattr (files, 'items') else files):
+            # Paths below a virtual source root of ''
+            fileContentDict ['/' + posixpath.normpath (relPath.replace ('\\', '/')) .lstrip ('/')] = content
+        return self.__run ('', '', self.subsetFilesList, False, fileContentDict, sink)
+
+    def watch (self, sourceRootDirectory = None, targetRootDirectory = None, interval = DEFAULT_WATCH_INTERVAL, stopEvent = None):
+        """
+        Obfuscates the source tree and then again whenever a file in it changes, until interrupted or until stopEvent,
+        a threading.Event, is set. The skip words, the name table and the outcome per file stay in memory, so each run
+        only reprocesses the changed files. Only if the incremental setting is on, this is also stored in the cache file
+        in the target directory, to be taken up by later runs. The sources are polled every interval seconds.
+        """
+        sourceRootDirectory = (os.getcwd () if sourceRootDirectory is None else sourceRootDirectory) .replace ('\\', '/')
+        if targetRootDirectory is None:
+            targetRootDirectory = '{0}/{1}_{2}'.format (* (sourceRootDirectory.rsplit ('/', 1) + [programName]))
+        targetRootDirectory = targetRootDirectory.replace ('\\', '/')
+
+        # Kept in memory between the runs, and only loaded and saved if incremental obfuscation is on
+        obfuscationCache = None if self.dryRun else opy_cache.ObfuscationCache (targetRootDirectory)
+        if obfuscationCache and self.incremental:
+            obfuscationCache.load ()
+
+        snapshot = None
+        try:
+            while not (stopEvent and stopEvent.is_set ()):
+                newSnapshot = self.__getSourceSnapshot (sourceRootDirectory, targetRootDirectory)
+                if newSnapshot != snapshot:
+                    snapshot = newSnapshot
+                    try:
+                        self.__run (sourceRootDirectory, targetRootDirectory, self.subsetFilesList, self.dryRun,
+                                    incremental = self.incremental, obfuscationCache = obfuscationCache)
+                    except Exception as exception:  # E.g. a file saved halfway, retried upon its next change
+                        print ('Obfuscation failed: {0}'.format (exception))
+                    print ('Watching {0} for changes, press Ctrl+C to stop\n'.format (sourceRootDirectory))
+                if stopEvent:
+                    stopEvent.wait (interval)
+                else:
+                    time.sleep (interval)
+        except KeyboardInterrupt:
+            pass
+
+    def __getSourceSnapshot (self, sourceRootDirectory, targetRootDirectory):
+        # Modification time and size of each source file, leaving out the target directory if it's inside the source tree
+        # and the skipped directories
+        pathFilter = opy_discovery.PathFilter (self.skipPathFragmentList)
+        snapshot = {}
+        for directory, subDirectories, fileNames in os.walk (sourceRootDirectory):
+            directory = directory.replace ('\\', '/')
+            if directory == targetRootDirectory or directory.startswith (targetRootDirectory + '/') or pathFilter.isSkippedDirectory (directory):
+                del subDirectories [:]
+                continue
+            for fileName in fileNames:
+                filePath = '{0}/{1}'.format (directory, fileName)
+                try:
+                    fileStat = os.stat (filePath)
+                except OSError: # Removed meanwhile
+                    continue
+                snapshot [filePath] = (fileStat.st_mtime, fileStat.st_size)
+        return snapshot
+
+    def __run (self, sourceRootDirectory, targetRootDirectory, subsetFilesList, dryRun, fileContentDict = None, sink = None, analyzeOnly = False,
+               incremental = False, obfuscationCache = None):
+        with self.__runLock:
+            # Another run profiling with cProfile or tracemalloc would be disturbed by this one doing so too
+            isProcessProfileAsked = PROFILE_CPROFILE in self.profileList or PROFILE_TRACEMALLOC in self.profileList
+            isProcessProfiling = isProcessProfileAsked and processProfileLock.acquire (False)
+            if isProcessProfileAsked and not isProcessProfiling:
+                print ('Warning: another run is profiling, so this one is not profiled by cprofile or tracemalloc')
+            try:
+                profiler = cProfile.Profile () if isProcessProfiling and PROFILE_CPROFILE in self.profileList else None
+                tracemalloc = self.__startTracemalloc () if isProcessProfiling and PROFILE_TRACEMALLOC in self.profileList else None
+                if profiler:
+                    profiler.enable ()
+                try:
+                    results = self.__obfuscate (
+                        sourceRootDirectory, targetRootDirectory, subsetFilesList, dryRun, fileContentDict, sink, analyzeOnly, incremental,
+                        obfuscationCache
+                    )
+                finally:
+                    # Only the work of this process is profiled, not that of the worker processes
+                    if profiler:
+                        profiler.disable ()
+                        self.__writeProfile ('prof', profiler.dump_stats)
+                    if tracemalloc:
+                        snapshot = tracemalloc.take_snapshot ()
+                        tracemalloc.stop ()
+                        self.__writeProfile ('tracemalloc', snapshot.dump)
+            finally:
+                if isProcessProfiling:
+                    processProfileLock.release ()
+            self.hooks.onRun (results)
+            return results
+
+    def __startTracemalloc (self):
+        try:
+            import tracemalloc
+        except ImportError: # Python 2
+            print ('Warning: tracemalloc requires Python 3.4 or later')
+            return None
+        if tracemalloc.is_tracing ():   # Started by the embedding program, whose tracing shouldn't be stopped
+            print ('Warning: tracemalloc is already tracing, so this run is not profiled by it')
+            return None
+        tracemalloc.start ()
+        return tracemalloc
+
+    def __writeProfile (self, extension, dump):
+        # Load a .prof file with the pstats module and a .tracemalloc file with tracemalloc.Snapshot.load
+        profileFilePath = '{0}/{1}.{2}'.format (self.profileDirectory.replace ('\\', '/'), PROFILE_FILE_PRE_NAME, extension)
+        dump (profileFilePath)
+        print ('Profile written to {0}'.format (profileFilePath))
+
+    def __obfuscate (self, sourceRootDirectory, targetRootDirectory, subsetFilesList, dryRun, fileContentDict = None, sink = None, analyzeOnly = False,
+                     incremental = False, obfuscationCache = None):
+        phaseTimer = opy_pipeline.PhaseTimer (onPhaseEnd = self.hooks.onPhase)
+        profileSteps = PROFILE_STEPS in self.profileList
+
+        # In memory, fileContentDict maps the source paths below the root '' onto their contents,
+        # while the outcomes go to sink, or else into obfuscatedContentList, rather than to disk
+        inMemory = fileContentDict is not None
+        obfuscatedContentList = []
+        inMemoryAssetPathList = []
+
+        def putContent (obfusPath, content):
+            if sink:
+                sink (obfusPath, content)
+            else:
+                obfuscatedContentList.append ((obfusPath, content))
+
+        # ============ Assign directories
+
+        if sourceRootDirectory is not None:
+            sourceRootDirectory = sourceRootDirectory.replace ('\\', '/')
+        else:
+            sourceRootDirectory = os.getcwd () .replace ('\\', '/')
+
+        if targetRootDirectory is not None:
+            targetRootDirectory = targetRootDirectory.replace ('\\', '/')
+        else:
+            targetRootDirectory = '{0}/{1}_{2}'.format (* (sourceRootDirectory.rsplit ('/', 1) + [programName]))
+
+        configFilePath = self.configFilePath
+        preppedOnly = self.preppedOnly
+        obfuscateStrings = self.obfuscateStrings
+        jobs = self.jobs
+        fileContext = self.fileContext
+        createdDirectorySet = set ()    # Target directories known to exist during this run, for the files written by this process
+
+        # =========== Generate skip list
+
+        skipWordSet = set (self.getExternalSkipWordSet ())
+
+        rawPlainFilePathList = ['{0}/{1}'.format (sourceRootDirectory, plainFileRelPath.replace ('\\', '/')) for plainFileRelPath in self.plainFileRelPathList]
+
+        # Prevent e.g. attempt to open opy_config.txt if it is in a different location but still listed under plain_files
+
+        plainFilePathList = [
+            plainFilePath for plainFilePath in rawPlainFilePathList
+            if (plainFilePath in fileContentDict if inMemory else os.path.exists (plainFilePath))
+        ]
+
+        for plainFilePath in plainFilePathList:
+            if inMemory:
+                content = fileContentDict [plainFilePath]
+                if isinstance (content, bytes):
+                    content = content.decode ('utf-8')
+            else:
+                plainFile = open (plainFilePath)
+                content = plainFile.read ()
+                plainFile.close ()
+
+            # Throw away comment-like line tails
+
+            content = fileContext.commentRegEx.sub ('', content)
+
+            # Throw away strings
+
+            content = fileContext.stringRegEx.sub ('', content)
+
+            # Put identifiers in skip word set
+
+            skipWordSet.update (fileContext.identifierRegEx.findall (content))
+        phaseTimer.endPhase ('skip words')
+
+        # ============ Gather the source files and prepare them as they're found
+
+        obfuscatedFileDict = {}
+        skippedPublicSet=set()
+
+        obfuscatableFileList = []   # (sourceFilePath, sourceFilePreName, sourceFileNameExtension, targetRelSubDirectory)
+        assetCopier = opy_pipeline.AssetCopier (self.assetCopyMode)   # Copies the other files while the sources are being obfuscated
+
+        pathFilter = opy_discovery.PathFilter (self.skipPathFragmentList, subsetFilesList)
+        plainFilePathSet = set (plainFilePathList)
+
+        # With incremental obfuscation, unchanged files of which the obfuscated version still exists are reused from the cache,
+        # which is loaded from the target directory, unless it's passed in, being kept in memory between runs
+
+        contentHashDict = {}
+        reusedFileDict = {}         # sourceFilePath -> opy_cache.CachedFile
+        previousObfusPathDict = {}  # Clear text relative path -> obfuscated path written by the previous run
+        if obfuscationCache is None and incremental and not (dryRun or inMemory):
+            obfuscationCache = opy_cache.ObfuscationCache (targetRootDirectory)
+            obfuscationCache.load ()
+        if obfuscationCache:
+            previousObfusPathDict = dict ([(clearRelPath, cachedFile.obfusPath) for clearRelPath, cachedFile in obfuscationCache.fileDict.items ()])
+
+        def getParsedSource (sourceFilePath):
+            # Content parsed before, by whatever file, needn't be parsed again
+            if obfuscationCache and contentHashDict [sourceFilePath] in obfuscationCache.parsedDict:
+                return opy_parser.ParsedSource.fromDict (obfuscationCache.parsedDict [contentHashDict [sourceFilePath]])
+            return None
+
+        def getPrepTaskArgs (sourceFilePath, sourceFilePreName):
+            return (
+                sourceFilePath, sourceFilePreName, profileSteps, getParsedSource (sourceFilePath),
+                fileContentDict [sourceFilePath] if inMemory else None, analyzeOnly, sourceFilePath [len (sourceRootDirectory) : ] .count ('/') - 1
+            )
+
+        def findFiles ():
+            # Yields the prep task arguments of each source file as soon as it's found, meanwhile starting the copy of the other files
+            if inMemory:
+                sourceFilePathIterable = [sourceFilePath for sourceFilePath in fileContentDict if pathFilter.isKept (sourceFilePath)]
+            else:
+                sourceFilePathIterable = opy_discovery.scanFiles (sourceRootDirectory, pathFilter)
+
+            for sourceFilePath in sourceFilePathIterable:
+                if sourceFilePath == configFilePath:    # Don't copy the config file to the target directory
+                    continue
+
+                sourceDirectory, sourceFileName = sourceFilePath.rsplit ('/', 1)
+                sourceFilePreName, sourceFileNameExtension = (sourceFileName.rsplit ('.', 1) + ['']) [ : 2]
+                targetRelSubDirectory = sourceFilePath [len (sourceRootDirectory) : ]
+
+                if sourceFileNameExtension in self.sourceFileNameExtensionList and not sourceFilePath in plainFilePathSet:
+                    obfuscatableFileList.append ((sourceFilePath, sourceFilePreName, sourceFileNameExtension, targetRelSubDirectory))
+                    if obfuscationCache:
+                        contentHashDict [sourceFilePath] = obfuscationCache.getContentHash (sourceFilePath)
+                        cachedFile = obfuscationCache.getReusable (targetRelSubDirectory [1:], contentHashDict [sourceFilePath])
+                        if cachedFile:
+                            reusedFileDict [sourceFilePath] = cachedFile
+                            continue
+                    yield getPrepTaskArgs (sourceFilePath, sourceFilePreName)
+                elif inMemory and not sourceFileNameExtension in self.skipFileNameExtensionList:
+                    putContent (targetRelSubDirectory [1:], fileContentDict [sourceFilePath])
+                    inMemoryAssetPathList.append (sourceFilePath)
+                elif (not dryRun) and (not sourceFileNameExtension in self.skipFileNameExtensionList):
+                    targetSubDirectory = '{0}{1}'.format (targetRootDirectory, targetRelSubDirectory) .rsplit ('/', 1) [0]
+
+                    # Create target path and copy file
+                    targetFilePath = '{0}/{1}'.format (targetSubDirectory, sourceFileName)
+                    assetCopier.copy (sourceFilePath, targetFilePath)
+
+        # Phase 1: prepare all files and collect their words, independently of each other,
+        # so each can be prepared as soon as it's found, overlapping the search for the others
+
+        preppedFileDict = dict ([
+            (preppedFile.sourceFilePath, preppedFile)
+            for preppedFile in opy_pipeline.mapFilesAsFound (jobs, opy_pipeline.prepTask, fileContext, findFiles ())
+        ])
+
+        # Sorted, so the name table, numbered in order of file, doesn't depend on the order in which the files were found
+        obfuscatableFileList.sort ()
+        phaseTimer.endPhase ('prepare')
+
+        def getObfusPath (sourceFilePreName, sourceFileNameExtension, targetRelSubDirectory):
+            if preppedOnly :
+                targetFilePreName = sourceFilePreName
+                targetSubDirectory = '{0}{1}'.format (targetRootDirectory, targetRelSubDirectory) .rsplit ('/', 1) [0]
+            else :
+                # Obfuscate module name, unless not in the table, e.g. toplevel module name
+                targetFilePreName = nameTable.getName (sourceFilePreName, sourceFilePreName)
+
+                # Obfuscate module subdir names, but only above the project root!
+                targetRelSubDirectory = '/'.join ([nameTable.getName (targetChunk, targetChunk) for targetChunk in targetRelSubDirectory.split ('/')])
+                targetSubDirectory = '{0}{1}'.format (targetRootDirectory, targetRelSubDirectory) .rsplit ('/', 1) [0]
+
+            obfusPath = '{0}/{1}.{2}'.format (targetSubDirectory, targetFilePreName, sourceFileNameExtension)
+            return obfusPath [1:] if inMemory else obfusPath   # In memory relative to the target root ''
+
+        def prepFiles (sourceFilePathSet):
+            return dict (zip (
+                [sourceFilePath for sourceFilePath, _, _, _ in obfuscatableFileList if sourceFilePath in sourceFilePathSet],
+                opy_pipeline.mapFiles (
+                    jobs, opy_pipeline.prepTask, fileContext,
+                    [getPrepTaskArgs (sourceFilePath, sourceFilePreName)
+                     for sourceFilePath, sourceFilePreName, _, _ in obfuscatableFileList if sourceFilePath in sourceFilePathSet]
+                )
+            ))
+
+        def getWordSource (sourceFilePath):
+            # The PreppedFile or else the CachedFile of a source file, both holding its words and imports
+            return preppedFileDict [sourceFilePath] if sourceFilePath in preppedFileDict else reusedFileDict [sourceFilePath]
+
+        for sourceFilePath, _, _, _ in obfuscatableFileList:
+            skippedPublicSet.update (getWordSource (sourceFilePath) .publicIdentifierSet)
+        skipWordSet.update (skippedPublicSet)
+
+        # Names of a previous run on the same directories with the same skip words remain valid
+        runKey = (sourceRootDirectory, targetRootDirectory, frozenset (skipWordSet))
+
+        if obfuscationCache:
+            fingerprint = opy_cache.getFingerprint (
+                __version__, str (fileContext.__dict__), self.obfuscatedNameTail, self.nameScheme, targetRootDirectory, sorted (skipWordSet)
+            )
+            if fingerprint != obfuscationCache.fingerprint:     # Names may have to change, so nothing can be reused
+                obfuscationCache.clear ()
+                obfuscationCache.fingerprint = fingerprint
+                phaseTimer.endPhase ('name table')
+                preppedFileDict.update (prepFiles (set (reusedFileDict)))
+                phaseTimer.endPhase ('prepare')
+                reusedFileDict = {}
+            retainedWordList = obfuscationCache.obfuscatedWordList
+        elif runKey == self.__lastRunKey:
+            retainedWordList = self.obfuscatedWordList
+        else:
+            retainedWordList = []
+
+        # Retain the names of the previous runs, new names shouldn't coincide with the words kept in clear text
+        nameTable = opy_names.NameTable (self.obfuscatedNameTail, retainedWordList, self.nameScheme, skipWordSet)
+
+        obfuscatedModImports = set ()
+        maskedIdentifiers = set ()
+        for sourceFilePath, _, _, _ in obfuscatableFileList:
+            obfuscatedModImports.update (getWordSource (sourceFilePath) .obfuscatedModImports)
+            maskedIdentifiers.update (getWordSource (sourceFilePath) .maskedIdentifiers)
+
+        # Freeze the name table
+        # Words are numbered in order of file, then in order of first appearance in that file, or with the frequency
+        # name scheme by their number of occurrences in all files, so the table only depends on the sources and not
+        # on the order in which files were processed
+
+        for sourceFilePath, _, _, _ in obfuscatableFileList:
+            wordSource = getWordSource (sourceFilePath)
+            # A reused file holds no counts, but its words are all in the retained table
+            wordCountList = wordSource.sourceWordCountList if sourceFilePath in preppedFileDict else [1] * len (wordSource.sourceWordList)
+            for sourceWord, wordCount in zip (wordSource.sourceWordList, wordCountList):
+                if not sourceWord in skipWordSet:
+                    nameTable.count (sourceWord, wordCount)
+
+        # With a shared unscrambler, one runtime module at the target root replaces the copies in all files
+
+        unScramblerPrepped = None
+        unScramblerTaskArgsList = []
+        if obfuscateStrings and self.sharedUnScrambler:
+            unScramblerPrepped = opy_pipeline.prepUnScrambler (fileContext)
+            for sourceWord, wordCount in zip (unScramblerPrepped.sourceWordList, unScramblerPrepped.sourceWordCountList):
+                if not sourceWord in skipWordSet:
+                    nameTable.count (sourceWord, wordCount)
+        nameTable.addCounted ()
+
+        if unScramblerPrepped:
+            unScramblerModuleName = opy_pipeline.getUnScramblerModuleName (self.plainMarker)
+            unScramblerTaskArgsList.append ((
+                unScramblerPrepped, getObfusPath (unScramblerModuleName, 'py', '/{0}.py'.format (unScramblerModuleName)), dryRun or inMemory, profileSteps, inMemory,
+                createdDirectorySet
+            ))
+
+        # Create target paths and track them against clear text relative sources
+
+        for sourceFilePath, sourceFilePreName, sourceFileNameExtension, targetRelSubDirectory in obfuscatableFileList:
+            obfuscatedFileDict [targetRelSubDirectory [1:]] = getObfusPath (sourceFilePreName, sourceFileNameExtension, targetRelSubDirectory)
+
+        # A new word may coincide with a directory name, moving files that are otherwise unchanged
+
+        movedFilePathSet = set ([
+            sourceFilePath for sourceFilePath, _, _, targetRelSubDirectory in obfuscatableFileList
+            if sourceFilePath in reusedFileDict and reusedFileDict [sourceFilePath] .obfusPath != obfuscatedFileDict [targetRelSubDirectory [1:]]
+        ])
+        phaseTimer.endPhase ('name table')
+        if movedFilePathSet:
+            preppedFileDict.update (prepFiles (movedFilePathSet))
+            for sourceFilePath in movedFilePathSet:
+                del reusedFileDict [sourceFilePath]
+            phaseTimer.endPhase ('prepare')
+
+        # Remove the obfuscated files of the previous run that moved or whose source is gone,
+        # before anything is written, since a new file may take the place of an old one
+
+        obfusPathSet = set (obfuscatedFileDict.values ())
+        for clearRelPath, previousObfusPath in previousObfusPathDict.items ():
+            if clearRelPath in obfuscatedFileDict:
+                isStale = obfuscatedFileDict [clearRelPath] != previousObfusPath
+            else:
+                isStale = not os.path.exists ('{0}/{1}'.format (sourceRootDirectory, clearRelPath))
+            if isStale and not previousObfusPath in obfusPathSet and os.path.isfile (previousObfusPath):
+                os.remove (previousObfusPath)
+
+        # Phase 2: rename the words in all files and write them, independently of each other
+
+        if analyzeOnly:     # Nothing to rewrite, the names are all that's asked for
+            rewrittenFileList = [
+                opy_pipeline.RewrittenFile (obfuscatedFileDict [targetRelSubDirectory [1:]])
+                for sourceFilePath, _, _, targetRelSubDirectory in obfuscatableFileList if sourceFilePath in preppedFileDict
+            ]
+        else:
+            rewrittenFileList = []
+            for rewrittenFile in opy_pipeline.iterFiles (jobs, opy_pipeline.rewriteTask, fileContext, [
+                (preppedFileDict [sourceFilePath], obfuscatedFileDict [targetRelSubDirectory [1:]], dryRun or inMemory, profileSteps, inMemory,
+                 createdDirectorySet)
+                for sourceFilePath, _, _, targetRelSubDirectory in obfuscatableFileList if sourceFilePath in preppedFileDict
+            ] + unScramblerTaskArgsList, nameTable.getNameDict ()):
+                if inMemory:    # Streamed out as soon as available, rather than kept until the end
+                    putContent (rewrittenFile.obfusPath, rewrittenFile.content)
+                    rewrittenFile.content = None
+                rewrittenFileList.append (rewrittenFile)
+        phaseTimer.endPhase ('rewrite')
+
+        assetCopier.wait ()
+        phaseTimer.endPhase ('copy')
+
+        if obfuscationCache:
+            for sourceFilePath, _, _, targetRelSubDirectory in obfuscatableFileList:
+                clearRelPath = targetRelSubDirectory [1:]
+                if sourceFilePath in preppedFileDict:
+                    preppedFile = preppedFileDict [sourceFilePath]
+                    obfuscationCache.fileDict [clearRelPath] = opy_cache.CachedFile (
+                        contentHashDict [sourceFilePath], obfuscatedFileDict [clearRelPath],
+                        [sourceWord for sourceWord in preppedFile.sourceWordList if sourceWord in nameTable],   # Skipped words are covered by the fingerprint
+                        preppedFile.publicIdentifierSet, preppedFile.obfuscatedModImports, preppedFile.maskedIdentifiers
+                    )
+
+            # Keep the parse outcomes of the current contents only
+            parsedDict = {}
+            for sourceFilePath, _, _, _ in obfuscatableFileList:
+                contentHash = contentHashDict [sourceFilePath]
+                if sourceFilePath in preppedFileDict and preppedFileDict [sourceFilePath] .parsedSource:
+                    parsedDict [contentHash] = preppedFileDict [sourceFilePath] .parsedSource.toDict ()
+                elif contentHash in obfuscationCache.parsedDict:
+                    parsedDict [contentHash] = obfuscationCache.parsedDict [contentHash]
+            obfuscationCache.parsedDict = parsedDict
+
+            # Forget files whose source is gone, their obfuscated version has been removed already
+            for clearRelPath in list (obfuscationCache.fileDict):
+                if not os.path.exists ('{0}/{1}'.format (sourceRootDirectory, clearRelPath)):
+                    del obfuscationCache.fileDict [clearRelPath]
+
+            obfuscationCache.obfuscatedWordList = nameTable.wordList
+            if incremental:
+                obfuscationCache.save ()
+            phaseTimer.endPhase ('cache')
+
+        # Keep the outcome, the name table of a real run is retained by the next one on the same directories
+
+        self.obfuscatedFileDict = obfuscatedFileDict
+        self.obfuscatedWordList = nameTable.wordList
+        self.nameTable = nameTable
+        self.obfuscatedModImports = obfuscatedModImports
+        self.maskedIdentifiers = maskedIdentifiers
+        self.skippedPublicSet = skippedPublicSet
+        self.skipWordList = sorted (skipWordSet, key = lambda s: s.lower ())
+        self.__lastRunKey = None if dryRun else runKey
+
+        # Opyfying something twice can and is allowed to fail.
+        # The obfuscation for e.g. variable 1 in round 1 can be the same as the obfuscation for e.g. variable 2 in round 2.
+        # If in round 2 variable 2 is replaced first, the obfuscation from round 1 for variable 1 will be replaced by the same thing.
+
+        results = OpyResults ()
+        results.obfuscatedFileDict   = obfuscatedFileDict
+        results.obfuscatedWordList   = nameTable.wordList
+        results.nameTable            = nameTable
+        results.obfuscatedModImports = obfuscatedModImports
+        results.maskedIdentifiers    = maskedIdentifiers
+        results.skippedPublicSet     = skippedPublicSet
+
+        rewrittenFileIter = iter (rewrittenFileList)
+        for sourceFilePath, _, _, targetRelSubDirectory in obfuscatableFileList:
+            clearRelPath = targetRelSubDirectory [1:]
+            if sourceFilePath in preppedFileDict:
+                preppedFile, rewrittenFile = preppedFileDict [sourceFilePath], next (rewrittenFileIter)
+                results.fileStatsDict [clearRelPath] = FileStats (
+                    rewrittenFile.obfusPath, preppedFile.bytesIn, rewrittenFile.bytesOut,
+                    preppedFile.prepSeconds, rewrittenFile.rewriteSeconds, isWritten = rewrittenFile.isWritten,
+                    stepSecondsDict = dict (list (preppedFile.stepSecondsDict.items ()) + list (rewrittenFile.stepSecondsDict.items ())),
+                    counterDict = dict (list (preppedFile.counterDict.items ()) + list (rewrittenFile.counterDict.items ()))
+                )
+            else:
+                obfusPath = obfuscatedFileDict [clearRelPath]
+                results.fileStatsDict [clearRelPath] = FileStats (
+                    obfusPath, os.path.getsize (sourceFilePath), os.path.getsize (obfusPath), isReused = True
+                )
+        results.assetFileCount = assetCopier.fileCount + len (inMemoryAssetPathList)
+        results.obfuscatedContentList = obfuscatedContentList
+        results.skipWordCount = len (skipWordSet)
+        results.isDryRun = dryRun
+        results.isAnalysis = analyzeOnly
+        results.phaseSecondsDict = phaseTimer.phaseSecondsDict
+        results.totalSeconds = phaseTimer.getTotalSeconds ()
+        for clearRelPath, fileStats in results.fileStatsDict.items ():
+            self.hooks.onFile (clearRelPath, fileStats)
+
+        print (results.getSummary ())
+        return results
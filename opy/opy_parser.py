@@ -1,231 +1,295 @@
 import re
 import ast
-import six 
+import tokenize
 
 NEWLINE              = '\n'
 SPACE                = ' '    
 CONTINUATION         = "\\"
 TAB                  = '\t'
-IMPORT_PREFIX        = "import "
-FROM_PREFIX          = "from "
+IMPORT_KEYWORD       = "import"
+FROM_KEYWORD         = "from"
 AS_KEYWORD           = "as"
+STATEMENT_DELIM      = ";"
+ELLIPSIS             = "..."
+OPEN_PAREN           = "("
+CLOSE_PAREN          = ")"
 MEMBER_DELIM = SUB_MOD_DELIM = "."
 LIST_DELIM           = ","        
 ALIAS_TEMPLATE       = "alias_%d"  
-SET_ALIAS_TEMPLATE   = "%s as %s"
-IMPORT_TEMPLATE      = "%simport %s"
-FROM_TEMPLATE        = "%sfrom %s import %s"  
 IDENTIFIER_REGEX     = r'\b{0}\b'
-IDENTIFIER_DOT_REGEX = r'\b{0}\.\b'
 CONTINUED_TEMPLATE   = "%s%s%s"
 LONG_LINE_TEMPLATE   = "%s%s"
 MAGIC_PREFFIX = MAGIC_SUFFIX = PRIVATE_PREFIX = "__"
 WILDCARD             = "*"
+IMPORT_START_REGEX   = re.compile( r'(?:^|;)[ \t]*((?:import|from)\b)', re.MULTILINE )
 
 # -----------------------------------------------------------------------------
 obfuscatedModImports = set()
 maskedIdentifiers    = set() 
-__modReplace = {}
-__modAliases = {}
-__mbrAliases = {} 
 
-__ANALIZE_MODE, __MASK_MODE, __REPLACE_MODE = tuple(range(3))
+class ImportItem:
+    """
+    A module imported by an import statement, or a name imported by a from statement
+    """
+    def __init__( self, name, start, end, alias=None ):
+        self.name  = name   # Dotted, without any whitespace
+        self.start = start  # Offsets of the name in the content
+        self.end   = end    # Including the alias, if any
+        self.alias = alias
+
+class ImportStatement:
+    """
+    An import or from statement, located by the offsets of its text in the content
+    """
+    def __init__( self, isFrom, start ):
+        self.isFrom   = isFrom
+        self.start    = start
+        self.end      = start
+        self.modName  = None    # From statements only, including the dots of a relative import
+        self.modStart = None    # Offsets of the module name, bar those dots
+        self.modEnd   = None
+        self.items    = []      # ImportItems, empty for a wildcard import
 
 def analyzeImports( fileContent, clearTextMods=[] ):
-    __parseImports( fileContent, __ANALIZE_MODE, clearTextMods )
+    global obfuscatedModImports, maskedIdentifiers
+    _, obfuscatedModImports, maskedIdentifiers = processImports( 
+        fileContent, clearTextMods, isRewriting=False )
 
 def injectAliases( fileContent, clearTextMods ):
-    return __parseImports( fileContent, __MASK_MODE, clearTextMods )
+    global obfuscatedModImports, maskedIdentifiers
+    fileContent, obfuscatedModImports, maskedIdentifiers = processImports( 
+        fileContent, clearTextMods, isMasking=True )
+    return fileContent
 
 def replaceImports( fileContent, replacements={} ):
-    return __parseImports( fileContent, __REPLACE_MODE, replacements=replacements )
+    return processImports( fileContent, replacements=replacements )[0]
 
-# TODO: Rewrite using the ast module. See findPublicIdentifiers()...
-def __parseImports( fileContent, mode, clearTextMods=[], replacements={} ):
+def processImports( fileContent, clearTextMods=[], replacements={}, 
+                    isMasking=False, isRewriting=True ):
     """
-    This function has multiple modes of operation: 
+    Finds the import statements and returns the revised fileContent, 
+    the names of the obfuscated modules that are imported and the 
+    identifiers imported from clear text modules (clearTextMods).
     
-    __ANALIZE_MODE 
-        Simply find imports and populate obfuscatedModImports and maskedIdentifiers 
-        
-    __MASK_MODE 
-        Provide aliases for the non-obfuscated imports modules and objects 
-        (i.e. clearTextMods). Those aliases then become obfuscated, 
-        by Opy implicitly, thereby making the code a bit more 
-        difficult to read... 
-        (of course it's not too hard to de-obfuscate that!)
-
-    __REPLACE_MODE        
-                
+    When rewriting, the imported modules are replaced per the old/new 
+    (key/value) pairs of replacements.  When masking as well, aliases are
+    provided for the clear text modules and objects imported without one.
+    Those aliases then become obfuscated, by Opy implicitly, thereby making 
+    the code a bit more difficult to read...  
+    (of course it's not too hard to de-obfuscate that!)
+    
+    Statements that can't be tokenized or parsed are left alone.
     """
+    modImports  = set()
+    maskedNames = set()
+    isRewriting = isRewriting and (isMasking or len( replacements ) > 0)
+    
+    # roll all lines broken via continuations
+    # into long single lines, thus eliminating that
+    # messy detail from any subsequent logic        
+    if isRewriting : 
+        fileContent = NEWLINE.join( __toLines( fileContent, combineContinued=True ) )
+    statements = findImports( fileContent )
 
-    global __modAliases, __mbrAliases, __modReplace                
-    __modAliases = {} 
-    __mbrAliases = {}
-    __modReplace = replacements
-
-    def isImportLn( line ):
-        # mulit-line strings/comments should have been isolated
-        # from the fileContent before assignExternalAliases was called
-        stripped = line.strip()
-        isImportLine = stripped.startswith( IMPORT_PREFIX )
-        isFromLine = stripped.startswith( FROM_PREFIX )
-        isEither = (isImportLine or isFromLine) 
-        return isEither, isImportLine, isFromLine
-        
     def isClearTextMod( modName ):
-        modSubs = modName.split( SUB_MOD_DELIM )
-        subMod = ""
-        for sub in modSubs:                
-            subMod += sub if subMod == "" else (SUB_MOD_DELIM + sub)
-            if subMod in clearTextMods: return True
-        return False                        
-
-    def replaceModKey( modName ):
-        modSubs = modName.split( SUB_MOD_DELIM )
-        subMod = ""
-        for sub in modSubs:                
-            subMod += sub if subMod == "" else (SUB_MOD_DELIM + sub)
-            if subMod in __modReplace: return subMod
-        return None                        
-    
-    def processLine( line, mode ):
-        global obfuscatedModImports, maskedIdentifiers, \
-            __modAliases, __mbrAliases, __modReplace
-        # determine if this is an import/from line
-        stripped = line.strip()
-        _, isImportLine, isFromLine = isImportLn( line )
-        replaceKey = None
-        # If it is an import/from line, split off the items 
-        # part of it, and remove any extra spaces in that. 
-        # Skip to the next line if there are no import items 
-        # to parse.
-        if isImportLine :                           
-            try: itemsPart = SPACE.join( stripped.split( SPACE )[1:] )     
-            except: return line
-        elif isFromLine:
-            tokens = stripped.split( SPACE )                
-            try:
-                # on a from line, if the module name is not 
-                # being replaced or preserved, skip the entire line                 
-                modName = tokens[1]                     
-                if mode==__REPLACE_MODE:
-                    replaceKey = replaceModKey( modName )
-                    if replaceKey is None : return line
-                    # replace the leading portions of the module name only
-                    # preserving any sub module names which may follow                    
-                    modName = modName.replace( replaceKey, 
-                                               __modReplace[replaceKey] )        
-                else:
-                    if not isClearTextMod( modName ):
-                        obfuscatedModImports.add( modName ) 
-                        return line                                                
-                itemsPart = SPACE.join( tokens[3:] )     
-            except: return line
-        else: return line               
-        # split & strip all the import items 
-        items = itemsPart.split( LIST_DELIM )
-        normList = [i.strip() for i in items]
-        revisedImports=[]
-        for item in normList :
-            # tokenize the list item 
-            tokens = item.split( SPACE )
-            importName = tokens[0]
-            if importName==WILDCARD:
-                revisedImports.append( item ) 
+        return __findModKey( modName, clearTextMods ) is not None
+
+    def replaceMod( modName ):
+        if modName.startswith( SUB_MOD_DELIM ) : return None   # Relative
+        replaceKey = __findModKey( modName, replacements )
+        if replaceKey is None : return None
+        # replace the leading portions of the module name only
+        # preserving any sub module names which may follow
+        return replacements[replaceKey] + modName[ len( replaceKey ): ]
+
+    aliases = {}    # import name -> alias
+    edits   = []    # (start, end, text), in order of appearance
+    for statement in statements:
+        if statement.isFrom :
+            # on a from line, if the module name is not 
+            # being preserved, skip the entire statement
+            replacement = replaceMod( statement.modName )
+            if replacement is not None :
+                edits.append( (statement.modStart, statement.modEnd, replacement) )
+                modName = replacement
+            else : modName = statement.modName
+            if not isClearTextMod( modName ):
+                modImports.add( modName )
                 continue
-            if isImportLine :
-                modName = importName
+        for item in statement.items :
+            alias = item.alias
+            if not statement.isFrom :
                 # on an import line, if the module name is not  
-                # being replaced or preserved, skip the item                                   
-                if mode==__REPLACE_MODE:
-                    replaceKey = replaceModKey( modName )
-                    isSkipped = replaceKey is None 
-                else:
-                    isSkipped = not isClearTextMod( modName )
-                    if isSkipped : obfuscatedModImports.add( modName ) 
-                if isSkipped :
-                    revisedImports.append( item )
-                    continue                           
-            # determine if the import is aliased
-            try   : isAliased = tokens[1]==AS_KEYWORD
-            except: isAliased = False
-            if mode==__REPLACE_MODE:
-                if isImportLine :
-                    # replace the leading portions of the module name only
-                    # preserving any sub module names which may follow                    
-                    replacement = importName.replace( replaceKey, 
-                                                      __modReplace[replaceKey] )                    
+                # being preserved, skip the item
+                modName = replaceMod( item.name )
+                if modName is not None :
                     # replace the module name and either preserve an 
-                    # existing alias, or alias it be the original name 
+                    # existing alias, or alias it by the original name 
                     # if it doesn't have one
-                    if isAliased :                
-                        try   : alias = tokens[2]
-                        except: alias = ""
-                    else : alias = importName
-                    item = SET_ALIAS_TEMPLATE % ( replacement, alias )
-            else :
-                # give the import an alias if it doesn't have one                
-                if not isAliased:
-                    alias = ( ALIAS_TEMPLATE % 
-                              (len(__modAliases) + len(__mbrAliases),) )
-                    item = SET_ALIAS_TEMPLATE % ( importName, alias )      
-                    if isImportLine : 
-                        __modAliases[importName]=alias
-                    else: 
-                        __mbrAliases[importName]=alias        
-                    maskedIdentifiers.add( importName )                                                
-            revisedImports.append( item )          
-        # re-build the line                                                        
-        leadSpaces = SPACE * (len(line) - len(line.lstrip(SPACE)))
-        itemsPart = LIST_DELIM.join( revisedImports )    
-        line = ( (IMPORT_TEMPLATE % (leadSpaces, itemsPart))
-                 if isImportLine else
-                 (FROM_TEMPLATE % 
-                   (leadSpaces, modName, itemsPart)) )
-        return line
-
-    def applyAliases( lines ): 
-        #TODO: trim this down. It functions, it's ugly...
-        nakedAliasesRegEx={}
-        dotAliasesRegEx={}        
-        for name in maskedIdentifiers :
-            nakedAliasesRegEx[name] = ( 
-                re.compile( IDENTIFIER_REGEX.format( name ) ) ) 
-        for name in maskedIdentifiers :
-            dotAliasesRegEx[name] = ( 
-                re.compile( IDENTIFIER_DOT_REGEX.format( name ) ) ) 
-        revLines = []   
-        for line in lines:
-            if not isImportLn( line )[0]:
-                for name, regEx in six.iteritems( dotAliasesRegEx ):
-                    modAlias = __modAliases.get(name)
-                    mbrAlias = __mbrAliases.get(name)                    
-                    if mbrAlias: line = regEx.sub( mbrAlias + MEMBER_DELIM, line )
-                    elif modAlias: line = regEx.sub( modAlias + MEMBER_DELIM, line )                    
-                for name, regEx in six.iteritems( nakedAliasesRegEx ):
-                    modAlias = __modAliases.get(name)
-                    mbrAlias = __mbrAliases.get(name)                    
-                    if mbrAlias: line = regEx.sub( mbrAlias, line )
-                    elif modAlias: line = regEx.sub( modAlias, line )                    
-            revLines.append( line )
-        return revLines
-
-    # split the fileContent into lines and
-    # roll all lines broken via continuations
-    # into long single lines, thus eliminating that
-    # messy detail from any subsequent logic        
-    lines = __toLines( fileContent, combineContinued=True )       
-    if (mode==__MASK_MODE) or (mode==__REPLACE_MODE):
-        revLines = []
-        # find all imports and apply replacements / inject aliases                                    
-        for l in lines: revLines.append( processLine( l, mode ) )
-        # in mask mode, apply the aliases to original import names
-        if mode==__MASK_MODE : revLines = applyAliases( revLines )
-        # reassemble and return the revised lines                   
-        return NEWLINE.join( revLines )
-    else : # find the imports, but discard revisions  
-        for l in lines: processLine( l, mode ) 
+                    edits.append( (item.start, item.start + len( item.name ), modName) )
+                    if alias is None :
+                        alias = item.name
+                        edits.append( (item.end, item.end, 
+                                       SPACE + AS_KEYWORD + SPACE + alias) )
+                else : modName = item.name
+                if not isClearTextMod( modName ):
+                    modImports.add( modName )
+                    continue
+            # give the import an alias if it doesn't have one
+            if alias is None :
+                maskedNames.add( item.name )
+                if isMasking :
+                    if item.name not in aliases :
+                        aliases[ item.name ] = ALIAS_TEMPLATE % (len( aliases ),)
+                    edits.append( (item.end, item.end, 
+                                   SPACE + AS_KEYWORD + SPACE + aliases[ item.name ]) )
+
+    if not isRewriting : return fileContent, modImports, maskedNames
+
+    # apply the edits to the import statements and the aliases to the 
+    # rest of the content, in a single pass
+    aliasesRegEx = __compileAliases( aliases )
+    pieces = []
+    position = 0
+    editIndex = 0
+    for statement in statements:
+        pieces.append( __applyAliases( fileContent[ position:statement.start ], aliases, aliasesRegEx ) )
+        position = statement.start
+        while editIndex < len( edits ) and edits[editIndex][0] <= statement.end :
+            start, end, text = edits[editIndex]
+            pieces.append( fileContent[ position:start ] )
+            pieces.append( text )
+            position = end
+            editIndex += 1
+        pieces.append( fileContent[ position:statement.end ] )
+        position = statement.end
+    pieces.append( __applyAliases( fileContent[ position: ], aliases, aliasesRegEx ) )
+    return ''.join( pieces ), modImports, maskedNames
+
+def findImports( fileContent ):
+    """
+    Returns the import and from statements at the start of a line or after 
+    a semicolon, as ImportStatements in order of appearance.
+    Multi-line strings/comments should have been isolated from the 
+    fileContent, so only the statements themselves need to be tokenized.
+    """
+    statements = []
+    position = 0
+    for match in IMPORT_START_REGEX.finditer( fileContent ):
+        start = match.start( 1 )
+        if start < position : continue
+        tokens = __tokenizeStatement( fileContent, start )
+        statement = __parseImport( tokens ) if tokens else None
+        if statement :
+            statements.append( statement )
+            position = statement.end
+    return statements
+
+def __tokenizeStatement( fileContent, start ):
+    # Returns the (string, start, end) tokens of the statement at start, 
+    # or None if it can't be tokenized
+    lineOffsets = []
+    nextLineStart = [ start ]
+    def readline():
+        lineStart = nextLineStart[0]
+        lineEnd = fileContent.find( NEWLINE, lineStart ) + 1 or len( fileContent )
+        lineOffsets.append( lineStart )
+        nextLineStart[0] = lineEnd
+        return fileContent[ lineStart:lineEnd ]
+
+    tokens = []
+    try:
+        for token in tokenize.generate_tokens( readline ):
+            tokenType, tokenString = token[0], token[1]
+            if( tokenType in (tokenize.NEWLINE, tokenize.ENDMARKER) or
+                (tokenType == tokenize.OP and tokenString == STATEMENT_DELIM) ): break
+            if tokenType in (tokenize.NL, tokenize.COMMENT) : continue
+            tokens.append( (tokenString, 
+                lineOffsets[ token[2][0] - 1 ] + token[2][1],
+                lineOffsets[ token[3][0] - 1 ] + token[3][1]) )
+    except (tokenize.TokenError, SyntaxError) : return None
+    return tokens
+
+def __parseImport( tokens ):
+    # Returns the ImportStatement made up by tokens, or None if it isn't valid
+    isFrom = tokens[0][0] == FROM_KEYWORD
+    statement = ImportStatement( isFrom, tokens[0][1] )
+    statement.end = tokens[-1][2]
+    index = 1
+    if isFrom :
+        modName = ""
+        while index < len( tokens ) and tokens[index][0] in (SUB_MOD_DELIM, ELLIPSIS):
+            modName += tokens[index][0]
+            index += 1
+        if index < len( tokens ) and tokens[index][0] != IMPORT_KEYWORD :
+            name, start, end, index = __parseDottedName( tokens, index )
+            if name is None : return None
+            modName += name
+            statement.modStart, statement.modEnd = start, end
+        statement.modName = modName
+        if index >= len( tokens ) or tokens[index][0] != IMPORT_KEYWORD : return None
+        index += 1
+        if index < len( tokens ) and tokens[index][0] == WILDCARD :
+            return statement if index + 1 == len( tokens ) else None
+        if index < len( tokens ) and tokens[index][0] == OPEN_PAREN :
+            if tokens[-1][0] != CLOSE_PAREN : return None
+            tokens = tokens[:-1]
+            index += 1
+    while index < len( tokens ):
+        name, start, end, index = __parseDottedName( tokens, index )
+        if name is None or (isFrom and SUB_MOD_DELIM in name) : return None
+        item = ImportItem( name, start, end )
+        if index < len( tokens ) and tokens[index][0] == AS_KEYWORD :
+            if index + 1 >= len( tokens ) : return None
+            item.alias = tokens[index + 1][0]
+            item.end = tokens[index + 1][2]
+            index += 2
+        statement.items.append( item )
+        if index < len( tokens ):
+            if tokens[index][0] != LIST_DELIM : return None
+            index += 1  # A trailing comma is allowed within parentheses
+    return statement if statement.items else None
+
+def __parseDottedName( tokens, index ):
+    # Returns the dotted name starting at tokens[index], its offsets and the index after it
+    name, start, end = "", None, None
+    while index < len( tokens ):
+        string, tokenStart, tokenEnd = tokens[index]
+        isDelim = len( name ) > 0 and not name.endswith( SUB_MOD_DELIM )
+        if isDelim and string == SUB_MOD_DELIM : pass
+        elif not isDelim and __isName( string ) : pass
+        else : break
+        name += string
+        if start is None : start = tokenStart
+        end = tokenEnd
+        index += 1
+    if name == "" or name.endswith( SUB_MOD_DELIM ) : return None, None, None, index
+    return name, start, end, index
+
+def __isName( string ):
+    return ( (string[:1].isalpha() or string[:1] == "_") and 
+             string not in (IMPORT_KEYWORD, FROM_KEYWORD, AS_KEYWORD) )
+
+def __findModKey( modName, modNames ):
+    # Returns the shortest leading portion of modName found in modNames, if any
+    modSubs = modName.split( SUB_MOD_DELIM )
+    for count in range( 1, len( modSubs ) + 1 ):
+        subMod = SUB_MOD_DELIM.join( modSubs[:count] )
+        if subMod in modNames : return subMod
+    return None
+
+def __compileAliases( aliases ):
+    # a single alternation of all the names, so that the content is scanned 
+    # once no matter how many there are, with the longest names first so that 
+    # a dotted module name (e.g. os.path) wins over its prefix (os)
+    if not aliases : return None
+    names = sorted( aliases, key=lambda name: (-len( name ), name) )
+    return re.compile( IDENTIFIER_REGEX.format( 
+        '(?:%s)' % ('|'.join( re.escape( name ) for name in names ),) ) )
+
+def __applyAliases( content, aliases, aliasesRegEx ):
+    if aliasesRegEx is None : return content
+    return aliasesRegEx.sub( lambda match: aliases[ match.group( 0 ) ], content )
 
 def __toLines( fileContent, combineContinued=False ):
     lines = fileContent.split( NEWLINE )
@@ -244,9 +308,56 @@ def __toLines( fileContent, combineContinued=False ):
     return lines 
 
 # -----------------------------------------------------------------------------
-def findPublicIdentifiers( fileContent ):
+class ParsedSource:
+    """
+    The analyses of a source file which need its syntax tree and only depend 
+    on its content, for now the public identifiers found for skip_public.
+    The tree is parsed once, upon first use, and shared by those analyses.
+    The outcomes can be stored and restored via toDict/fromDict, so that an
+    unchanged file need not be parsed again.
+    The import handling doesn't use the tree: it works on the content after 
+    the comments and strings were replaced by placeholders, and only 
+    tokenizes the import statements themselves (see findImports).
+    The lexer tokenizes the content separately too, to find those literals.
+    """
+    def __init__( self, fileContent=None, publicIdentifierSet=None ):
+        self.fileContent = fileContent
+        self.tree        = None
+        self.publicIdentifierSet = publicIdentifierSet  # None until found
+
+    def getTree( self ):
+        if self.tree is None : self.tree = ast.parse( self.fileContent )
+        return self.tree
+
+    def getPublicIdentifiers( self ):
+        if self.publicIdentifierSet is None : 
+            self.publicIdentifierSet = findPublicIdentifiers( self )
+        return self.publicIdentifierSet
+
+    def release( self ):
+        # drop the content and the tree, keeping the (small) outcomes
+        self.fileContent = self.tree = None
+
+    def toDict( self ):
+        d = {}
+        if self.publicIdentifierSet is not None : 
+            d["publicIdentifierSet"] = sorted( self.publicIdentifierSet )
+        return d
+
+    @staticmethod
+    def fromDict( d ):
+        publicIdentifierSet = d.get( "publicIdentifierSet" )
+        return ParsedSource( publicIdentifierSet=( None if publicIdentifierSet is None 
+                                                   else set( publicIdentifierSet ) ) )
+
+def findPublicIdentifiers( source ):
+    """
+    Returns the public identifiers defined by source, 
+    either the content of a file or its ParsedSource
+    """
     publicIds=set()
-    root = ast.parse( fileContent )    
+    root = ( source.getTree() if isinstance( source, ParsedSource ) 
+             else ast.parse( source ) )
     publicIds.update( __findAstPublicNameAssigns( root ) )
     publicIds.update( __findAstPublicFuncsClassesAttribs( root ) )
     return publicIds
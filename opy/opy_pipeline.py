@@ -0,0 +1,708 @@
+"""
+Per file stages of the Opy obfuscation pipeline
+
+Obfuscation runs in two phases:
+
+Phase 1 (prepFile) reads a source file, swaps its comments and strings for
+placeholders, handles its imports and collects the words it contains.
+
+Phase 2 (rewriteFile) renames those words via the name table, which is frozen
+for the whole project in between the phases, restores the placeholders and
+writes the result.
+
+Neither phase depends on any other file, so mapFiles can run them in a
+process pool.
+"""
+import re
+import os
+import sys
+import errno
+import codecs
+import shutil
+import tempfile
+import time
+import itertools
+import collections
+
+isPython2 = sys.version_info [0] == 2
+
+try:
+    from . import opy_parser            # @UnusedImport
+    from . import opy_lexer             # @UnusedImport
+except:
+    import opy_parser                   # @Reimport
+    import opy_lexer                    # @Reimport
+
+try:
+    import concurrent.futures as futures
+except ImportError: # Python 2 without the futures backport
+    futures = None
+
+programName = 'opy'
+
+charBase = 2048         # Choose high to prevent string recoding from generating special chars like ', " and \
+charModulus = 7
+
+# =========== Utilities
+
+umask = os.umask (0)            # Only readable by setting it, so restore it right away
+os.umask (umask)
+
+replaceFile = getattr (os, 'replace', None) or os.rename  # Python 2 lacks os.replace, its os.rename only replaces on Posix
+
+class PhaseTimer:
+    """
+    Accumulates the wall clock time spent in each phase, in order of first appearance, and counts of what happened in them.
+    A disabled timer does nothing, so the instrumentation can stay in place at negligible cost.
+    """
+    def __init__ (self, isEnabled = True, onPhaseEnd = None):
+        self.isEnabled = isEnabled
+        self.onPhaseEnd = onPhaseEnd    # Called with the name and the seconds of each phase that ends
+        self.phaseSecondsDict = collections.OrderedDict ()
+        self.counterDict = {}
+        self.startTime = self.phaseStartTime = time.time ()
+
+    def endPhase (self, phaseName):
+        if self.isEnabled:
+            now = time.time ()
+            seconds = now - self.phaseStartTime
+            self.phaseSecondsDict [phaseName] = self.phaseSecondsDict.get (phaseName, 0.0) + seconds
+            self.phaseStartTime = now
+            if self.onPhaseEnd:
+                self.onPhaseEnd (phaseName, seconds)
+
+    def addCount (self, counterName, count = 1):
+        if self.isEnabled:
+            self.counterDict [counterName] = self.counterDict.get (counterName, 0) + count
+
+    def getTotalSeconds (self):
+        return self.phaseStartTime - self.startTime
+
+def createFilePath (filePath, open = False, createdDirectorySet = None):  # @ReservedAssignment
+    # CreatedDirectorySet, if given, holds the directories known to exist during the current run, so they aren't created again
+    directory = filePath.rsplit ('/', 1) [0]
+    if createdDirectorySet is None or not directory in createdDirectorySet:
+        try:
+            os.makedirs (directory)
+        except OSError as exception:
+            if exception.errno != errno.EEXIST:
+                raise
+        if createdDirectorySet is not None:
+            createdDirectorySet.add (directory)
+
+    if open:
+        return codecs.open (filePath, encoding = 'utf-8', mode = 'w')
+
+def getUnScrambler (plainMarker):
+    # Each string literal is decoded and evaluated only once, after that it's fetched from the cache
+    return '''
+from sys import version_info as __opyVerInfo
+
+isPython2{0} = __opyVerInfo[0] == 2
+charBase{0} = {1}
+charModulus{0} = {2}
+unScrambled{0} = {{}}
+
+def unScramble{0} (keyedStringLiteral):
+    try:
+        return unScrambled{0} [keyedStringLiteral]
+    except KeyError:
+        pass
+
+    stringNr = ord (keyedStringLiteral [-1])
+    rotatedStringLiteral = keyedStringLiteral [:-1]
+
+    rotationDistance = stringNr % len (rotatedStringLiteral)
+    recodedStringLiteral = rotatedStringLiteral [:rotationDistance] + rotatedStringLiteral [rotationDistance:]
+
+    if isPython2{0}:
+        stringLiteral = unicode () .join ([unichr (ord (char) - charBase{0} - (charIndex + stringNr) % charModulus{0}) for charIndex, char in enumerate (recodedStringLiteral)])
+    else:
+        stringLiteral = str () .join ([chr (ord (char) - charBase{0} - (charIndex + stringNr) % charModulus{0}) for charIndex, char in enumerate (recodedStringLiteral)])
+
+    unScrambled{0} [keyedStringLiteral] = eval (stringLiteral)
+    return unScrambled{0} [keyedStringLiteral]
+    '''.format (plainMarker, charBase, charModulus)
+
+def getUnScramblerModuleName (plainMarker):
+    return 'unScrambler{0}'.format (plainMarker)
+
+def getUnScramblerImport (plainMarker, packageDepth = 0):
+    # Imports the unscrambler from the shared runtime module at the root of the target directory, packageDepth directories up.
+    # Relative to the importing file if the target directory is imported as a package, else as a top level module, e.g. when
+    # the target directory is on the module search path, or for a script run from it. Python 2 raises a ValueError then.
+    return '\n'.join ([
+        'try:',
+        '    from {0}{1} import unScramble{2}',
+        'except (ImportError, ValueError):',
+        '    from {1} import unScramble{2}'
+    ]) .format ('.' * (packageDepth + 1), getUnScramblerModuleName (plainMarker), plainMarker)
+
+class Scrambler:
+    """
+    Scrambles the string literals of one file.
+    The numbering of the strings restarts for each file, so the scrambled
+    result depends only on the file itself and not on the processing order.
+    """
+    def __init__ (self):
+        self.stringNr = charBase
+
+    def scramble (self, stringLiteral):
+        if isPython2:
+            recodedStringLiteral = unicode () .join ([unichr (charBase + ord (char) + (charIndex + self.stringNr) % charModulus) for charIndex, char in enumerate (stringLiteral)])
+            stringKey = unichr (self.stringNr)
+        else:
+            recodedStringLiteral = str () .join ([chr (charBase + ord (char) + (charIndex + self.stringNr) % charModulus) for charIndex, char in enumerate (stringLiteral)])
+            stringKey = chr (self.stringNr)
+
+        rotationDistance = self.stringNr % len (stringLiteral)
+        rotatedStringLiteral = recodedStringLiteral [:-rotationDistance] + recodedStringLiteral [-rotationDistance:]
+        keyedStringLiteral = rotatedStringLiteral + stringKey
+
+        self.stringNr += 1
+        return 'u"' + keyedStringLiteral + '"'
+
+# =========== Per run settings
+
+class FileContext:
+    """
+    The settings and compiled tools shared by the processing of all files.
+    This is passed to the worker processes once, so it must remain picklable.
+    """
+    def __init__ (self
+                 , plainMarker             = '_{}_'.format (programName)
+                 , obfuscateStrings        = False
+                 , pep8Comments            = True
+                 , skipPublicIdentifiers   = False
+                 , preppedOnly             = False
+                 , replacementModulesDict  = {}
+                 , maskExternalModules     = False
+                 , externalModuleNameList  = []
+                 , sharedUnScrambler       = False
+                 ):
+        self.plainMarker            = plainMarker
+        self.obfuscateStrings       = obfuscateStrings
+        self.pep8Comments           = pep8Comments
+        self.skipPublicIdentifiers  = skipPublicIdentifiers
+        self.preppedOnly            = preppedOnly
+        self.replacementModulesDict = replacementModulesDict
+        self.maskExternalModules    = maskExternalModules
+        self.externalModuleNameList = externalModuleNameList
+        self.sharedUnScrambler      = sharedUnScrambler
+
+        # ============ Define comment swapping tools
+
+        self.shebangCommentRegEx = re.compile (r'^{0}!'.format (r'#'))
+        self.codingCommentRegEx = re.compile ('coding[:=]\s*([-\w.]+)')
+        self.keepCommentRegEx = re.compile ('.*{0}.*'.format (plainMarker), re.DOTALL)
+
+        self.commentRegEx = (
+                re.compile (r'{0}{1}{2}.*?$'.format (
+                    r"(?<!')",
+                    r'(?<!")',
+                    r'  # '  # According to PEP8 an inline comment should start like this.
+                ), re.MULTILINE)
+            if pep8Comments else
+                re.compile (r'{0}{1}{2}.*?$'.format (
+                    r"(?<!')",
+                    r'(?<!")',
+                    r'#'
+                ), re.MULTILINE)
+        )
+        self.commentPlaceholder = '_{0}_c_'.format (programName)
+        self.commentPlaceholderRegEx = re.compile (r'{0}'.format (self.commentPlaceholder))
+
+        # ============ Define string swapping tools
+
+        self.keepStringRegEx = re.compile (r'.*{0}.*'.format (plainMarker))
+
+        self.stringRegEx = re.compile (r'([ru]|ru|ur|[rb]|rb|br)?(({0})|({1})|({2})|({3}))'.format (
+            r"'''.*?(?<![^\\]\\)(?<![^\\]\')'''",
+            r'""".*?(?<![^\\]\\)(?<![^\\]\")"""',
+            r"'.*?(?<![^\\]\\)'",
+            r'".*?(?<![^\\]\\)"'
+        ), re.MULTILINE | re.DOTALL | re.VERBOSE)
+
+        self.stringPlaceholder = '_{0}_s_'.format (programName)
+        self.stringPlaceholderRegEx = re.compile (r'{0}'.format (self.stringPlaceholder))
+
+        # ============ Define 'from future' moving tools
+
+        self.fromFutureRegEx = re.compile ('from\s*__future__\s*import\s*\w+.*$', re.MULTILINE)
+
+        # ============ Define identifier recognition tools
+
+        self.identifierRegEx = re.compile (r'''
+            \b          # Delimeted
+            (?!{0})     # Not starting with commentPlaceholder
+            (?!{1})     # Not starting with stringPlaceholder
+            [^\d\W]     # De Morgan: Not (decimal or nonalphanumerical) = not decimal and alphanumerical
+            \w*         # Alphanumerical
+            (?<!__)     # Not ending with __
+            (?<!{0})    # Not ending with commentPlaceholder
+            (?<!{1})    # Not ending with stringPlaceHolder
+            \b          # Delimited
+        '''.format (self.commentPlaceholder, self.stringPlaceholder), re.VERBOSE) # De Morgan
+
+        # Placeholders or else identifiers, to rewrite a file in one go
+        self.rewriteRegEx = re.compile (r'({0})|({1})|(?:{2})'.format (
+            self.commentPlaceholder, self.stringPlaceholder, self.identifierRegEx.pattern
+        ), re.VERBOSE)
+
+class PreppedFile:
+    """
+    The outcome of phase 1 for a single source file
+    """
+    def __init__ (self, sourceFilePath):
+        self.sourceFilePath       = sourceFilePath
+        self.specialLineList      = []      # Shebang, coding and 'from __future__' lines, kept out of normalContent
+        self.normalContent        = ''      # Content with comments and strings swapped for placeholders
+        self.replacedComments     = []
+        self.replacedStrings      = []
+        self.sourceWordList       = []      # Unique words in order of first appearance, module name last
+        self.sourceWordCountList  = []      # Number of occurrences of each word in sourceWordList
+        self.publicIdentifierSet  = set ()
+        self.parsedSource         = None    # The opy_parser.ParsedSource when skipping public identifiers, released
+        self.obfuscatedModImports = set ()
+        self.maskedIdentifiers    = set ()
+        self.bytesIn              = 0
+        self.prepSeconds          = 0.0
+        self.stepSecondsDict      = {}      # Only filled when profiling steps
+        self.counterDict          = {}      # Idem
+
+class RewrittenFile:
+    """
+    The outcome of phase 2 for a single source file
+    """
+    def __init__ (self, obfusPath):
+        self.obfusPath            = obfusPath
+        self.bytesOut             = 0
+        self.content              = None    # The obfuscated content as bytes, only kept if asked for
+        self.isWritten            = False   # False if the obfuscated file already held this content, or with a dry run
+        self.rewriteSeconds       = 0.0
+        self.stepSecondsDict      = {}      # Only filled when profiling steps
+        self.counterDict          = {}      # Idem
+
+# =========== Phase 1: prepare a file and collect its words
+
+def prepFile (context, sourceFilePath, sourceFilePreName, stepTimer = PhaseTimer (False), parsedSource = None, content = None, analyzeOnly = False,
+              packageDepth = 0):
+    # The content is read from sourceFilePath, unless supplied as text or UTF-8 bytes
+    # When analyzing only, just the words and imports are collected, there's no content to rewrite
+    # The package depth is the number of directories between the source root and the file
+    prepped = PreppedFile (sourceFilePath)
+
+    if content is None:
+        sourceFile = codecs.open (sourceFilePath, encoding = 'utf-8')
+        content = sourceFile.read ()
+        sourceFile.close ()
+    elif isinstance (content, bytes):
+        content = content.decode ('utf-8')
+    stepTimer.endPhase ('read')
+
+    if context.skipPublicIdentifiers:
+        # A ParsedSource restored from the cache already holds the outcome, so the content isn't parsed again
+        if parsedSource is None:
+            parsedSource = opy_parser.ParsedSource ()
+        parsedSource.fileContent = content
+        prepped.publicIdentifierSet = parsedSource.getPublicIdentifiers ()
+        parsedSource.release ()
+        prepped.parsedSource = parsedSource
+        stepTimer.endPhase ('public')
+
+    replacedComments = prepped.replacedComments
+    replacedStrings = prepped.replacedStrings
+    scrambler = Scrambler ()
+    fromFutureList = []
+
+    def getCommentPlaceholderAndRegister (comment):
+        if context.keepCommentRegEx.search (comment):   # Rare, so no need for speed
+            replacedComments.append (comment.replace (context.plainMarker, ''))
+            return context.commentPlaceholder
+        else:
+            return ''
+
+    def getDecodedStringPlaceholderAndRegister (string, isConcatenation = False):
+        if context.obfuscateStrings:
+            if context.keepStringRegEx.search (string): # Rare, so no need for speed
+                replacedStrings.append (string.replace (context.plainMarker, ''))
+                return context.stringPlaceholder    # Store original string minus plainMarker, no need to unscramble
+            else:
+                if not analyzeOnly:
+                    replacedStrings.append (scrambler.scramble ('({0})'.format (string) if isConcatenation else string))   # Parenthesized, since it may span lines
+                return 'unScramble{0} ({1})'.format (context.plainMarker, context.stringPlaceholder)    # Store unScramble (<scrambledString>)
+        else:
+            replacedStrings.append (string)
+            return context.stringPlaceholder
+
+    def getFStringTextPlaceholderAndRegister (string):
+        replacedStrings.append (string.replace (context.plainMarker, ''))     # F-strings can't be scrambled, since they'd be evaluated out of context
+        return context.stringPlaceholder
+
+    literalHandlers = {
+        opy_lexer.COMMENT: getCommentPlaceholderAndRegister,
+        opy_lexer.STRING: getDecodedStringPlaceholderAndRegister,
+        opy_lexer.STRINGS: lambda strings: getDecodedStringPlaceholderAndRegister (strings, True),
+        opy_lexer.FSTRING_TEXT: getFStringTextPlaceholderAndRegister
+    }
+
+    def moveFromFuture (matchObject):
+        fromFuture = matchObject.group (0)
+        if fromFuture:
+            fromFutureList.append (fromFuture)
+        return ''
+
+    contentList = content.split ('\n', 2)
+
+    nrOfSpecialLines = 0
+    insertCodingComment = True
+
+    if len (contentList) > 0:
+        if context.shebangCommentRegEx.search (contentList [0]):                                # If the original code starts with a shebang line
+            nrOfSpecialLines += 1                                                               #   Account for that
+            if len (contentList) > 1 and context.codingCommentRegEx.search (contentList [1]):   #   If after the shebang a coding comment follows
+                nrOfSpecialLines += 1                                                           #       Account for that
+                insertCodingComment = False                                                     #       Don't insert, it's already there
+        elif context.codingCommentRegEx.search (contentList [0]):                               # Else if the original code starts with a coding comment
+            nrOfSpecialLines += 1                                                               #   Account for that
+            insertCodingComment = False                                                         #   Don't insert, it's already there
+
+    if context.obfuscateStrings and insertCodingComment:                                        # Obfuscated strings are always converted to unicode
+        contentList [nrOfSpecialLines:nrOfSpecialLines] = ['# coding: UTF-8']                   # Insert the coding line if it wasn't there
+        nrOfSpecialLines += 1                                                                   # And remember it's there
+                                                                                                # Nothing has to happen with an eventual shebang line
+    if context.obfuscateStrings:
+        normalContent = '\n'.join ([
+            getUnScramblerImport (context.plainMarker, packageDepth) if context.sharedUnScrambler else getUnScrambler (context.plainMarker)
+        ] + contentList [nrOfSpecialLines:])
+    else:
+        normalContent = '\n'.join (contentList [nrOfSpecialLines:])
+
+    # At this point normalContent does not contain the special lines
+    # They are in contentList
+
+    # Replace comments and strings by placeholders, in a single tokenizer pass
+    # Sources that can't be tokenized, e.g. since they're written for another Python version, fall back to regular expressions
+
+    literalList = opy_lexer.findLiterals (normalContent, context.pep8Comments)
+    if literalList is None:
+        normalContent, commentCount = context.commentRegEx.subn (lambda matchObject: getCommentPlaceholderAndRegister (matchObject.group (0)), normalContent)
+        normalContent, stringCount = context.stringRegEx.subn (lambda matchObject: getDecodedStringPlaceholderAndRegister (matchObject.group (0)), normalContent)
+        stepTimer.addCount ('regexLiterals', commentCount + stringCount)
+    else:
+        stepTimer.addCount ('lexedLiterals', len (literalList))
+        pieceList = []
+        position = 0
+        for kind, start, end in literalList:
+            pieceList.append (normalContent [position : start])
+            pieceList.append (literalHandlers [kind] (normalContent [start : end]))
+            position = end
+        pieceList.append (normalContent [position:])
+        normalContent = ''.join (pieceList)
+
+    # Take eventual out 'from __future__ import ... ' line and add it after the other special lines
+
+    normalContent = context.fromFutureRegEx.sub (moveFromFuture, normalContent)
+    prepped.specialLineList = contentList [:nrOfSpecialLines] + fromFutureList
+    stepTimer.addCount ('keptComments', len (replacedComments))
+    stepTimer.addCount ('replacedStrings', len (replacedStrings))
+    stepTimer.endPhase ('literals')
+
+    # Replace any imported modules per the old/new (key/value) pairs provided and, when masking,
+    # provide aliases for those in clear text, so that they will become "masked" upon obfuscation.
+    # Analysis and both kinds of edits share a single pass over the import statements.
+    normalContent, prepped.obfuscatedModImports, prepped.maskedIdentifiers = opy_parser.processImports (
+        normalContent, context.externalModuleNameList, context.replacementModulesDict, context.maskExternalModules
+    )
+    prepped.normalContent = normalContent
+    stepTimer.endPhase ('imports')
+
+    if not context.preppedOnly :
+        # All source words and module name, in order of first appearance, and how often they occur
+        prepped.sourceWordList, prepped.sourceWordCountList = countWords (context.identifierRegEx.findall (normalContent) + [sourceFilePreName])
+        stepTimer.addCount ('words', len (prepped.sourceWordList))
+        stepTimer.endPhase ('words')
+
+    if analyzeOnly:
+        prepped.normalContent = ''
+        prepped.replacedComments, prepped.replacedStrings = [], []
+
+    return prepped
+
+def prepUnScrambler (context):
+    # The shared runtime module has no source, its words are obfuscated like those of any other module
+    prepped = PreppedFile (None)
+    prepped.specialLineList = ['# coding: UTF-8']
+    prepped.normalContent = getUnScrambler (context.plainMarker)
+    if not context.preppedOnly :
+        prepped.sourceWordList, prepped.sourceWordCountList = countWords (context.identifierRegEx.findall (prepped.normalContent))
+    return prepped
+
+def countWords (wordList):
+    # Returns the unique words in order of first appearance and the number of occurrences of each
+    indexDict = {}
+    uniqueWordList = []
+    countList = []
+    for word in wordList:
+        index = indexDict.get (word)
+        if index is None:
+            indexDict [word] = len (uniqueWordList)
+            uniqueWordList.append (word)
+            countList.append (1)
+        else:
+            countList [index] += 1
+    return uniqueWordList, countList
+
+# =========== Phase 2: rename the words of a file and write it
+
+def rewriteFile (context, obfuscatedNameDict, prepped, stepTimer = PhaseTimer (False)):
+    normalContent = prepped.normalContent
+
+    # Replace words to be obfuscated by obfuscated ones and placeholders by the strings and nonempty comments they stand for
+    # A single scan over all identifiers and placeholders, each word resolved by a dict lookup,
+    # so the cost is proportional to the size of the file rather than to the number of words in the project
+
+    replacedStrings = iter (prepped.replacedStrings)
+    replacedComments = iter (prepped.replacedComments)
+    if context.preppedOnly:
+        obfuscatedNameDict = {}
+
+    def getRewrittenWord (matchObject):
+        if matchObject.group (1):
+            return next (replacedComments)
+        if matchObject.group (2):
+            return next (replacedStrings)
+        word = matchObject.group (0)
+        return obfuscatedNameDict.get (word, word)
+
+    normalContent, substitutionCount = context.rewriteRegEx.subn (getRewrittenWord, normalContent)
+    stepTimer.addCount ('substitutions', substitutionCount)
+    stepTimer.endPhase ('rename')
+
+    content = '\n'.join (prepped.specialLineList + [normalContent])
+
+    # Remove empty lines
+
+    content = '\n'.join ([line for line in [line.rstrip () for line in content.split ('\n')] if line])
+    stepTimer.endPhase ('join')
+    return content
+
+def writeFile (filePath, content, createdDirectorySet = None):
+    """
+    Writes content, text or utf-8 encoded bytes, to filePath, unless it already holds exactly that, so its mtime only changes if its content does.
+    The content is written aside first and then moved in place, so readers never see a partially written file.
+    Returns True if the file was written.
+    """
+    contentBytes = content if isinstance (content, bytes) else content.encode ('utf-8')
+    try:
+        if os.path.getsize (filePath) == len (contentBytes):
+            with open (filePath, 'rb') as targetFile:
+                if targetFile.read () == contentBytes:
+                    return False
+        fileMode = os.stat (filePath) .st_mode & 0o7777
+    except (OSError, IOError):  # No such file yet
+        createFilePath (filePath, createdDirectorySet = createdDirectorySet)
+        fileMode = 0o666 & ~umask
+
+    directory, fileName = filePath.rsplit ('/', 1)
+    tempFileHandle, tempFilePath = tempfile.mkstemp (prefix = '.{0}.'.format (fileName), suffix = '.tmp', dir = directory)
+    try:
+        with os.fdopen (tempFileHandle, 'wb') as tempFile:
+            tempFile.write (contentBytes)
+        os.chmod (tempFilePath, fileMode)   # Rather than the private mode of temporary files
+        replaceFile (tempFilePath, filePath)
+    except:
+        os.remove (tempFilePath)
+        raise
+    return True
+
+# =========== Copy the files that aren't obfuscated
+
+COPY, HARDLINK, REFLINK, UPDATE = assetCopyModes = ('copy', 'hardlink', 'reflink', 'update')
+
+FICLONE = 0x40049409    # Linux ioctl sharing the data blocks of two files on copy-on-write filesystems like btrfs and xfs
+
+def __reflinkFile (sourceFilePath, targetFilePath):
+    with open (sourceFilePath, 'rb') as sourceFile, open (targetFilePath, 'wb') as targetFile:
+        try:
+            import fcntl
+            fcntl.ioctl (targetFile.fileno (), FICLONE, sourceFile.fileno ())
+            return
+        except (ImportError, IOError, OSError):
+            pass
+        try:    # Otherwise at least copy within the kernel, which can still share blocks on some filesystems
+            remainingSize = os.fstat (sourceFile.fileno ()) .st_size
+            while remainingSize > 0:
+                copiedSize = os.copy_file_range (sourceFile.fileno (), targetFile.fileno (), remainingSize)
+                if not copiedSize:
+                    break
+                remainingSize -= copiedSize
+            if remainingSize <= 0:
+                return
+        except (AttributeError, IOError, OSError):  # Python < 3.8, other platforms or unsupported filesystem
+            pass
+    shutil.copyfile (sourceFilePath, targetFilePath)
+
+def copyAsset (sourceFilePath, targetFilePath, copyMode = COPY, createdDirectorySet = None):
+    """
+    Copies a file that isn't obfuscated to the target directory, returning False if that wasn't needed.
+    With HARDLINK the target is linked to the source, with REFLINK it shares the data blocks of the source if possible,
+    with UPDATE it's only copied if its size or mtime differ from the source.
+    HARDLINK and REFLINK fall back to copying where the filesystem doesn't support them.
+    """
+    createFilePath (targetFilePath, createdDirectorySet = createdDirectorySet)
+    try:
+        targetStat = os.stat (targetFilePath)
+    except OSError:
+        targetStat = None
+
+    if targetStat:
+        sourceStat = os.stat (sourceFilePath)
+        if (sourceStat.st_dev, sourceStat.st_ino) == (targetStat.st_dev, targetStat.st_ino):   # Linked before
+            if copyMode in (HARDLINK, UPDATE):
+                return False
+        elif copyMode == UPDATE and (sourceStat.st_size, int (sourceStat.st_mtime)) == (targetStat.st_size, int (targetStat.st_mtime)):
+            return False
+        os.remove (targetFilePath)  # Never write through a link to the source
+
+    if copyMode == HARDLINK:
+        try:
+            os.link (sourceFilePath, targetFilePath)
+            return True
+        except (AttributeError, OSError):   # E.g. another device
+            pass
+
+    if copyMode == REFLINK:
+        __reflinkFile (sourceFilePath, targetFilePath)
+    else:
+        shutil.copyfile (sourceFilePath, targetFilePath)
+    if copyMode == UPDATE:
+        shutil.copystat (sourceFilePath, targetFilePath)    # Including the mtime, to recognize the copy next time
+    return True
+
+class AssetCopier:
+    """
+    Copies files in a pool of threads, in parallel with the obfuscation of the source files
+    """
+    def __init__ (self, copyMode = COPY):
+        self.copyMode = copyMode
+        self.executor = futures.ThreadPoolExecutor () if futures else None
+        self.futureList = []
+        self.fileCount = 0
+        self.createdDirectorySet = set ()  # Of this run only, since directories may be removed between runs
+
+    def copy (self, sourceFilePath, targetFilePath):
+        self.fileCount += 1
+        if self.executor:
+            self.futureList.append (self.executor.submit (copyAsset, sourceFilePath, targetFilePath, self.copyMode, self.createdDirectorySet))
+        else:
+            copyAsset (sourceFilePath, targetFilePath, self.copyMode, self.createdDirectorySet)
+
+    def wait (self):
+        # Raises the first error that occurred while copying, if any
+        if self.executor:
+            self.executor.shutdown (wait = True)
+            for future in self.futureList:
+                future.result ()
+
+# =========== Task wrappers, usable in and out of a worker process
+
+def prepTask (context, obfuscatedNameDict, sourceFilePath, sourceFilePreName, profileSteps = False, parsedSource = None, content = None,
+              analyzeOnly = False, packageDepth = 0):
+    stepTimer = PhaseTimer (profileSteps)
+    startTime = time.time ()
+    prepped = prepFile (context, sourceFilePath, sourceFilePreName, stepTimer, parsedSource, content, analyzeOnly, packageDepth)
+    if content is None:
+        prepped.bytesIn = os.path.getsize (sourceFilePath)
+    else:
+        prepped.bytesIn = len (content if isinstance (content, bytes) else content.encode ('utf-8'))
+    prepped.prepSeconds = time.time () - startTime
+    prepped.stepSecondsDict, prepped.counterDict = stepTimer.phaseSecondsDict, stepTimer.counterDict
+    return prepped
+
+def rewriteTask (context, obfuscatedNameDict, prepped, obfusPath, dryRun, profileSteps = False, keepContent = False, createdDirectorySet = None):
+    stepTimer = PhaseTimer (profileSteps)
+    startTime = time.time ()
+    rewritten = RewrittenFile (obfusPath)
+    contentBytes = rewriteFile (context, obfuscatedNameDict, prepped, stepTimer) .encode ('utf-8')
+    rewritten.bytesOut = len (contentBytes)
+    if keepContent:
+        rewritten.content = contentBytes
+    if not dryRun:
+        rewritten.isWritten = writeFile (obfusPath, contentBytes, createdDirectorySet)
+        stepTimer.addCount ('writes', int (rewritten.isWritten))
+        stepTimer.endPhase ('write')
+    rewritten.rewriteSeconds = time.time () - startTime
+    rewritten.stepSecondsDict, rewritten.counterDict = stepTimer.phaseSecondsDict, stepTimer.counterDict
+    return rewritten
+
+__workerContext = None
+__workerNameDict = None
+
+def __initWorker (context, obfuscatedNameDict):
+    global __workerContext, __workerNameDict
+    __workerContext = context
+    __workerNameDict = obfuscatedNameDict
+
+def __runTask (taskAndArgs):
+    return taskAndArgs [0] (__workerContext, __workerNameDict, *taskAndArgs [1:])
+
+def resolveJobs (jobs):
+    """
+    Returns the number of worker processes to use, 0 (or less) meaning one per cpu
+    """
+    if jobs > 0: return jobs
+    try:
+        return os.cpu_count () or 1
+    except AttributeError: # Python 2
+        import multiprocessing
+        return multiprocessing.cpu_count ()
+
+def iterFiles (jobs, task, context, taskArgsList, obfuscatedNameDict = None):
+    """
+    Applies task to each tuple of arguments in taskArgsList and yields the results in the same order,
+    each as soon as it's available.  When jobs > 1 the tasks are spread over a pool of worker processes,
+    each of which receives the context and the name table only once.
+    """
+    jobs = resolveJobs (jobs)
+    if jobs == 1 or futures is None or len (taskArgsList) < 2:
+        for taskArgs in taskArgsList:
+            yield task (context, obfuscatedNameDict, *taskArgs)
+        return
+
+    jobs = min (jobs, len (taskArgsList))
+    with futures.ProcessPoolExecutor (
+        max_workers = jobs, initializer = __initWorker, initargs = (context, obfuscatedNameDict)
+    ) as executor:
+        for result in executor.map (
+            __runTask,
+            [(task,) + tuple (taskArgs) for taskArgs in taskArgsList],
+            chunksize = max (1, len (taskArgsList) // (jobs * 4))
+        ):
+            yield result
+
+def mapFiles (jobs, task, context, taskArgsList, obfuscatedNameDict = None):
+    """
+    Like iterFiles, but returns the list of all results
+    """
+    return list (iterFiles (jobs, task, context, taskArgsList, obfuscatedNameDict))
+
+def mapFilesAsFound (jobs, task, context, taskArgsIterable, obfuscatedNameDict = None):
+    """
+    Like mapFiles, but takes the tuples of arguments from an iterable, e.g. a generator that finds the files,
+    and starts each task as soon as its arguments are available, rather than after they've all been found
+    """
+    jobs = resolveJobs (jobs)
+    taskArgsIterator = iter (taskArgsIterable)
+    firstTaskArgsList = list (itertools.islice (taskArgsIterator, 2))   # A pool isn't worth it for a single task
+    if jobs == 1 or futures is None or len (firstTaskArgsList) < 2:
+        return [task (context, obfuscatedNameDict, *taskArgs) for taskArgs in itertools.chain (firstTaskArgsList, taskArgsIterator)]
+
+    with futures.ProcessPoolExecutor (
+        max_workers = jobs, initializer = __initWorker, initargs = (context, obfuscatedNameDict)
+    ) as executor:
+        futureList = [
+            executor.submit (__runTask, (task,) + tuple (taskArgs))
+            for taskArgs in itertools.chain (firstTaskArgsList, taskArgsIterator)
+        ]
+        return [future.result () for future in futureList]
@@ -0,0 +1,338 @@
+"""
+Names of builtins and external modules that should not be obfuscated
+
+Collecting these means importing each external module and walking its entire
+object graph, which for big libraries takes long and costs a lot of memory.
+A SkipIndex therefore keeps the names found per module in an index file,
+keyed by the module name, its version and the interpreter, so that later
+runs can skip both the import and the walk.
+
+Alternatively, the names of third party modules can be collected statically,
+by parsing the source or stub files of a module and of the modules it imports,
+without importing any of them.  Standard modules are still imported, since
+parsing them would miss the attributes that only exist at runtime, e.g. of the
+types implemented in C, while importing them is harmless.
+"""
+import os
+import sys
+import ast
+import json
+import codecs
+import platform
+import sysconfig
+import importlib
+
+try:
+    from . import opy_pipeline          # @UnusedImport
+except:
+    import opy_pipeline                 # @Reimport
+
+isPython2 = sys.version_info [0] == 2
+if isPython2 :
+    import __builtin__ as builtins  # @UnresolvedImport
+else:
+    import builtins
+
+SUB_MOD_DELIM        = "."
+BUILTINS_MODULE_NAME = builtins.__name__
+STDLIB_VERSION       = "stdlib"
+STATIC_SUFFIX        = "static"
+STUB_EXTENSION       = ".pyi"
+STUBS_PACKAGE_SUFFIX = "-stubs"
+INIT_MODULE_NAME     = "__init__"
+INDEX_FORMAT         = 1
+DEFAULT_INDEX_DIR    = os.path.join( "~", ".opy", "skip_index" )
+
+# -----------------------------------------------------------------------------
+def addExternalNames( anObject, plainMarker, skipWordSet, externalObjects ):
+    """
+    Recursively adds the attribute and parameter names of anObject to skipWordSet
+    """
+    if anObject in externalObjects:
+        return
+    else:
+        externalObjects.update( [anObject] )
+
+    try:
+        attributeNameList = list( anObject.__dict__ )
+    except:
+        attributeNameList = []
+
+    try:
+        if isPython2:
+            parameterNameList = list( anObject.func_code.co_varnames )
+        else:
+            parameterNameList = list( anObject.__code__.co_varnames )
+    except:
+        parameterNameList = []
+
+    attributeList = [getattr( anObject, attributeName ) for attributeName in attributeNameList]
+    attributeSkipWordList = (plainMarker.join( attributeNameList )).split( plainMarker ) # Split module name chunks that were joined by placeholder
+
+    updateSet = set( [entry for entry in (parameterNameList + attributeSkipWordList) if not (entry.startswith( '__' ) and entry.endswith( '__' ))] )
+    # Entries both starting and ending with __ are skipped anyhow by the identifier regex, not including them here saves time
+
+    skipWordSet.update( updateSet )
+
+    for attribute in attributeList:
+        try:
+            addExternalNames( attribute, plainMarker, skipWordSet, externalObjects )
+        except:
+            pass
+
+def getModuleNames( moduleName, plainMarker, externalObjects=None ):
+    """
+    Imports a module and returns the names found in it, together with
+    a flag telling if it could be inspected.  Even if it couldn't, the
+    chunks of the module name itself are returned.
+    """
+    if externalObjects is None : externalObjects = set()
+    if moduleName == BUILTINS_MODULE_NAME :
+        skipWordSet = set()
+        addExternalNames( builtins, plainMarker, skipWordSet, externalObjects )
+        return skipWordSet, True
+    skipWordSet = set( [chunk for chunk in moduleName.split( SUB_MOD_DELIM )
+                        if not (chunk.startswith( '__' ) and chunk.endswith( '__' ))] )
+    try:
+        module = importlib.import_module( moduleName )
+    except Exception as exception:
+        print( exception )
+        print( 'Warning: could not inspect external module {0}'.format( moduleName ) )
+        return skipWordSet, False
+    addExternalNames( module, plainMarker, skipWordSet, externalObjects )
+    return skipWordSet, True
+
+# -----------------------------------------------------------------------------
+def getStaticModuleNames( moduleName, plainMarker ):
+    """
+    Collects the names of a module and of the modules it imports at module level,
+    by parsing their source or stub files rather than importing them.
+    Standard modules are imported and inspected instead, like getModuleNames does.
+    Returns the names, together with a flag telling if the module could be inspected.
+    """
+    skipWordSet = set()
+    scannedModules = set()
+    pendingModules = [moduleName]
+    externalObjects = set()
+    isInspected = False
+    while pendingModules :
+        currentName = pendingModules.pop()
+        if currentName in scannedModules : continue
+        scannedModules.add( currentName )
+        if isStandardModule( currentName ) :
+            # Imported items guessed to be submodules may turn out not to be modules at all
+            if currentName == moduleName or not SUB_MOD_DELIM in currentName or findModuleFile( currentName )[2] :
+                names, isImported = getModuleNames( currentName, plainMarker, externalObjects )
+                skipWordSet.update( names )
+                isInspected = isInspected or isImported
+            continue
+        filePath, isPackage, _ = findModuleFile( currentName )
+        if filePath is None :
+            if currentName == moduleName : # Sources of the modules imported by it are optional
+                print( 'Warning: could not find the source or stubs of external module {0}'.format( currentName ) )
+                return __getNameChunks( moduleName ), False
+            continue
+        try:
+            with open( filePath, 'rb' ) as f:
+                root = ast.parse( f.read(), filePath )
+        except Exception as exception:
+            print( 'Warning: could not parse {0}: {1}'.format( filePath, exception ) )
+            continue
+        isInspected = True
+        skipWordSet.update( __getAstNames( root ) )
+        packageName = currentName if isPackage else currentName.rpartition( SUB_MOD_DELIM )[0]
+        pendingModules.extend( __getAstImports( root, packageName ) )
+    skipWordSet.update( __getNameChunks( moduleName ) )
+    return set( [name for name in skipWordSet
+                 if not (name.startswith( '__' ) and name.endswith( '__' ))] ), isInspected
+
+def findModuleFile( moduleName ):
+    """
+    Locates the stub or else the source file of a module, without importing it or its parents.
+    Returns the path, or None, together with flags telling if it's a package and if the module exists at all.
+    """
+    try:
+        import importlib.util
+        from importlib.machinery import PathFinder
+    except ImportError: return None, False, False # Python 2
+    parts = moduleName.split( SUB_MOD_DELIM )
+    try:
+        spec = importlib.util.find_spec( parts[0] )
+        for part in parts[1:] :
+            if spec is None or not spec.submodule_search_locations : return None, False, False
+            spec = PathFinder.find_spec( part, spec.submodule_search_locations )
+    except Exception: spec = None
+    isFound = spec is not None
+    isPackage = isFound and spec.submodule_search_locations is not None
+
+    # Separate stubs packages (PEP 561) take precedence, then stubs next to the sources
+    for searchDir in sys.path :
+        stubPath = os.path.join( searchDir or os.curdir, parts[0] + STUBS_PACKAGE_SUFFIX, *parts[1:] )
+        for candidate, isCandidatePackage in ( ( os.path.join( stubPath, INIT_MODULE_NAME + STUB_EXTENSION ), True ),
+                                               ( stubPath + STUB_EXTENSION, False ) ):
+            if os.path.isfile( candidate ) : return candidate, isCandidatePackage, True
+    if not isFound or not spec.origin or not os.path.isfile( spec.origin ) :
+        return None, isPackage, isFound
+    stubPath = os.path.splitext( spec.origin )[0] + STUB_EXTENSION
+    if os.path.isfile( stubPath ) : return stubPath, isPackage, True
+    if spec.origin.endswith( ('.py', '.pyw') ) : return spec.origin, isPackage, True
+    # A compiled module, possibly with a stub named after the module rather than the binary
+    stubPath = os.path.join( os.path.dirname( spec.origin ), parts[-1] + STUB_EXTENSION )
+    return ( stubPath if os.path.isfile( stubPath ) else None ), isPackage, True
+
+def isStandardModule( moduleName ):
+    """
+    Tells if a module belongs to the standard library of the running interpreter, without importing it
+    """
+    topName = moduleName.split( SUB_MOD_DELIM )[0]
+    if topName in sys.builtin_module_names : return True
+    if hasattr( sys, 'stdlib_module_names' ) : return topName in sys.stdlib_module_names # Python 3.10 and later
+    # Before, tell by where the module is installed, without importing it
+    try:
+        if isPython2 :
+            import imp
+            modulePath = imp.find_module( topName )[1]
+        else:
+            import importlib.util
+            spec = importlib.util.find_spec( topName )
+            modulePath = spec.origin if spec is not None else None
+    except Exception: return False
+    if not modulePath : return False
+    modulePath = os.path.normcase( os.path.abspath( modulePath ) )
+    stdlibDirectory = os.path.normcase( os.path.abspath( sysconfig.get_paths()['stdlib'] ) )
+    return ( modulePath.startswith( stdlibDirectory + os.sep ) and
+             not any( packagesDirName in modulePath for packagesDirName in ( 'site-packages', 'dist-packages' ) ) )
+
+def __getNameChunks( moduleName ):
+    return set( moduleName.split( SUB_MOD_DELIM ) )
+
+def __getAstNames( root ):
+    # Errs on the generous side: every identifier found in the module is kept in clear text
+    names = set()
+    for node in ast.walk( root ):
+        if isinstance( node, ast.Name ) : names.add( node.id )
+        elif isinstance( node, ast.Attribute ) : names.add( node.attr )
+        elif isinstance( node, (ast.FunctionDef, ast.ClassDef) ) : names.add( node.name )
+        elif getattr( ast, 'AsyncFunctionDef', None ) and isinstance( node, ast.AsyncFunctionDef ) :
+            names.add( node.name )
+        elif getattr( ast, 'arg', None ) and isinstance( node, ast.arg ) : names.add( node.arg )
+        elif isinstance( node, ast.keyword ) and node.arg : names.add( node.arg )
+        elif isinstance( node, ast.alias ) :
+            names.update( node.name.split( SUB_MOD_DELIM ) )
+            if node.asname : names.add( node.asname )
+        elif isinstance( node, ast.ImportFrom ) and node.module :
+            names.update( node.module.split( SUB_MOD_DELIM ) )
+        elif isinstance( node, (ast.Global, getattr( ast, 'Nonlocal', ast.Global )) ) :
+            names.update( node.names )
+    names.discard( '*' )
+    return names
+
+def __getAstImports( root, packageName ):
+    # Modules imported at module level become attributes of the module, so they are followed as well
+    moduleNames = []
+    pendingNodes = list( root.body )
+    while pendingNodes :
+        node = pendingNodes.pop()
+        if isinstance( node, ast.Import ) :
+            moduleNames.extend( [alias.name for alias in node.names] )
+        elif isinstance( node, ast.ImportFrom ) :
+            baseName = node.module or ''
+            if node.level :
+                packageParts = packageName.split( SUB_MOD_DELIM ) if packageName else []
+                if node.level > 1 : packageParts = packageParts[:-(node.level - 1)]
+                baseName = SUB_MOD_DELIM.join( packageParts + ( [node.module] if node.module else [] ) )
+            if not baseName : continue
+            moduleNames.append( baseName )
+            # The imported items may be submodules themselves
+            moduleNames.extend( [baseName + SUB_MOD_DELIM + alias.name
+                                 for alias in node.names if alias.name != '*'] )
+        elif not isinstance( node, (ast.FunctionDef, ast.ClassDef) ) :
+            for fieldName in ( 'body', 'orelse', 'finalbody', 'handlers' ) :
+                pendingNodes.extend( getattr( node, fieldName, [] ) )
+    return moduleNames
+
+# -----------------------------------------------------------------------------
+def getInterpreterKey():
+    return '{0}-{1}'.format( platform.python_implementation().lower(),
+                             '.'.join( [str( part ) for part in sys.version_info[:3]] ) )
+
+class SkipIndex:
+    """
+    Provides the skip words of builtins and external modules, from the index
+    directory where possible.  Without an index directory, all names are
+    collected by inspection, sharing one set of visited objects between modules.
+    """
+    def __init__( self, indexDirectory, plainMarker, isStatic=False ):
+        self.plainMarker = plainMarker
+        self.isStatic = isStatic
+        self.indexDirectory = indexDirectory
+        if indexDirectory is not None :
+            self.indexDirectory = os.path.join(
+                os.path.expanduser( indexDirectory or DEFAULT_INDEX_DIR ),
+                getInterpreterKey() )
+        self.__externalObjects = set()
+        self.__packagesDistributions = None
+
+    def getNames( self, moduleName, refresh=False ):
+        indexFilePath = self.getIndexFilePath( moduleName )
+        if indexFilePath and not refresh :
+            names = self.__load( indexFilePath )
+            if names is not None : return names
+        if self.isStatic and moduleName != BUILTINS_MODULE_NAME :
+            names, isInspected = getStaticModuleNames( moduleName, self.plainMarker )
+        else:
+            # Each module has to be walked on its own to be indexed on its own
+            names, isInspected = getModuleNames( moduleName, self.plainMarker,
+                None if indexFilePath else self.__externalObjects )
+        if indexFilePath and isInspected : self.__save( indexFilePath, names )
+        return names
+
+    def getIndexFilePath( self, moduleName ):
+        if self.indexDirectory is None : return None
+        version = self.getModuleVersion( moduleName )
+        if version is None : return None
+        if self.isStatic and moduleName != BUILTINS_MODULE_NAME :
+            version = '{0}-{1}'.format( version, STATIC_SUFFIX )
+        return os.path.join( self.indexDirectory,
+                             '{0}-{1}.json'.format( moduleName, version ) )
+
+    def getModuleVersion( self, moduleName ):
+        """
+        Determines the version of a module without importing it, or None if that's not possible
+        """
+        topName = moduleName.split( SUB_MOD_DELIM )[0]
+        if topName == BUILTINS_MODULE_NAME or isStandardModule( topName ) :
+            return STDLIB_VERSION # Covered by the interpreter version
+        try:
+            from importlib import metadata  # @UnresolvedImport
+            if self.__packagesDistributions is None:
+                self.__packagesDistributions = metadata.packages_distributions()
+            distNames = self.__packagesDistributions.get( topName )
+            if distNames : return metadata.version( distNames[0] )
+        except Exception: pass
+        try: # Not installed as a distribution (or an older Python), resort to the time stamp of the module
+            import importlib.util
+            spec = importlib.util.find_spec( topName )
+            if spec is not None and spec.origin and os.path.isfile( spec.origin ):
+                return 'mtime%d' % int( os.path.getmtime( spec.origin ) )
+        except Exception: pass
+        return None
+
+    def __load( self, indexFilePath ):
+        try:
+            with codecs.open( indexFilePath, encoding='utf-8' ) as f:
+                d = json.load( f )
+            if d["format"] != INDEX_FORMAT or d["plainMarker"] != self.plainMarker :
+                return None
+            return set( d["names"] )
+        except Exception: return None
+
+    def __save( self, indexFilePath, names ):
+        try:
+            # Written to a temporary file of its own and then moved in place, since other runs may share the index
+            opy_pipeline.writeFile( indexFilePath.replace( '\\', '/' ),
+                                    json.dumps( { "format"      : INDEX_FORMAT
+                                                , "plainMarker" : self.plainMarker
+                                                , "names"       : sorted( names ) } ) )
+        except (IOError, OSError) as exception: # An index that can't be written only costs time
+            print( 'Warning: could not write skip index {0}: {1}'.format( indexFilePath, exception ) )
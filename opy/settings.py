@@ -3,12 +3,6 @@ import six
 
 isPython2 = six.PY2
 
-isLibraryInvoked    = False
-printHelp           = False
-sourceRootDirectory = None
-targetRootDirectory = None
-configFilePath      = None # None == default, False == use configSettings
-
 class ConfigSettings :
     """
     See opy_config.txt for details on these settings.
@@ -16,6 +10,7 @@ class ConfigSettings :
     def __init__( self ) :    
         self.obfuscate_strings = True        
         self.obfuscated_name_tail = '_opy_'  
+        self.name_scheme = 'binary'
         self.plain_marker = '_opy_'          
         self.pep8_comments = False
         self.source_extensions = [ 'py', 'pyx' ]          
@@ -54,18 +49,36 @@ class ConfigSettings :
         self.subset_files = []
         self.dry_run = False
         self.prepped_only = False        
+        self.jobs = 1
+        self.incremental = False
+        self.skip_index = False
+        self.skip_index_directory = ''
+        self.static_external_modules = False
+        self.shared_unscrambler = False
+        self.asset_copy_mode = 'copy'
+        self.profile = []
+        self.profile_directory = ''
 
     def __str__( self ):
         # TODO : rewrite this in a more clean/clever manner... 
         text = ( 
               "obfuscate_strings = %s\n" % str(self.obfuscate_strings)         
             + "obfuscated_name_tail = '%s'\n" % self.obfuscated_name_tail
+            + "name_scheme = %r\n" % self.name_scheme
             + "plain_marker = '%s'\n" % self.plain_marker
             + "pep8_comments = %s\n" % str(self.pep8_comments)
             + "mask_external_modules = %s\n" % str(self.mask_external_modules)
             + "skip_public = %s\n" % str(self.skip_public)
             + "dry_run = %s\n" % str(self.dry_run)
             + "prepped_only = %s\n" % str(self.prepped_only)            
+            + "jobs = %d\n" % self.jobs
+            + "incremental = %s\n" % str(self.incremental)
+            + "skip_index = %s\n" % str(self.skip_index)
+            + "skip_index_directory = %r\n" % self.skip_index_directory
+            + "static_external_modules = %s\n" % str(self.static_external_modules)
+            + "shared_unscrambler = %s\n" % str(self.shared_unscrambler)
+            + "asset_copy_mode = %r\n" % self.asset_copy_mode
+            + "profile_directory = %r\n" % self.profile_directory
         )
         text += "source_extensions ='''\n"
         for item in self.source_extensions : text += "%s\n" % item
@@ -92,6 +105,9 @@ class ConfigSettings :
         text += "subset_files ='''\n"
         for item in self.subset_files : text += "%s\n" % item
         text += "'''\n"
+        text += "profile ='''\n"
+        for item in self.profile : text += "%s\n" % item
+        text += "'''\n"
         return text
 
     def toVirtualFile( self ):         
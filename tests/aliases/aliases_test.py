@@ -0,0 +1,35 @@
+from opy import opy_parser
+
+clearTextMods = [ "os", "json" ]
+
+# ( name, source, expected content )
+cases = [
+    ( "word boundaries"
+    , "from os.path import join, exists\nx = joined + join( a ) + exists_too\nif exists( x ): pass\n"
+    , "from os.path import join as alias_0, exists as alias_1\nx = joined + alias_0( a ) + exists_too\nif alias_1( x ): pass\n" )
+,   ( "dotted names first"
+    , "import os\nimport os.path\nprint( os.path.sep, os.sep, os.pathsep )\n"
+    , "import os as alias_0\nimport os.path as alias_1\nprint( alias_1.sep, alias_0.sep, alias_0.pathsep )\n" )
+    # Each name is replaced once, so an alias is never replaced in turn, even if it equals an imported name
+,   ( "single pass"
+    , "from json import alias_1, loads\nprint( alias_1, loads )\n"
+    , "from json import alias_1 as alias_0, loads as alias_1\nprint( alias_0, alias_1 )\n" )
+]
+
+# Many names sharing prefixes, e.g. name1, name10 and name100
+nameCount = 200
+names   = [ "name%d" % index for index in range( nameCount ) ]
+aliases = [ "alias_%d" % index for index in range( nameCount ) ]
+cases.append( ( "many names"
+              , "from json import %s\nresult = [ %s ]\n" % (", ".join( names ), ", ".join( reversed( names ) ))
+              , "from json import %s\nresult = [ %s ]\n" % (
+                  ", ".join( "%s as %s" % pair for pair in zip( names, aliases ) ), ", ".join( reversed( aliases ) )) ) )
+
+print( "--- ALIASES ---" )
+allPassed = True
+for name, source, content in cases:
+    outcome = opy_parser.processImports( source, clearTextMods, isMasking=True )[0]
+    isPassed = outcome == content
+    allPassed = allPassed and isPassed
+    if not isPassed: print( "Failed %s: %r" % (name, outcome) )
+print( "All passed: %s" % (allPassed,) )
@@ -0,0 +1,49 @@
+from opy import analyze, obfuscate, OpyConfig, opy_pipeline
+import os, sys, shutil, tempfile
+
+thisDir   = os.path.dirname( os.path.realpath( sys.argv[0] ) )
+parentDir = os.path.dirname( thisDir )
+workDir   = tempfile.mkdtemp( prefix="opy_analyze_" )
+scrDir    = os.path.join( workDir, "source" )   # The default target directory of the analysis would be a sibling of it
+trgDir    = os.path.join( workDir, "obfuscated" )
+
+# Count the files that are rewritten
+rewrittenFiles = []
+realRewriteFile = opy_pipeline.rewriteFile
+def countingRewriteFile( context, obfuscatedNameDict, prepped, *args, **kwargs ):
+    rewrittenFiles.append( prepped )
+    return realRewriteFile( context, obfuscatedNameDict, prepped, *args, **kwargs )
+opy_pipeline.rewriteFile = countingRewriteFile
+
+def getConfig():
+    config = OpyConfig()
+    config.plain_names = [ "poly_walker_test" ]
+    return config
+
+def getRelativeFileDict( results, rootDirectory ):
+    return dict( ( clearRelPath, os.path.relpath( obfusPath, rootDirectory ) )
+                 for clearRelPath, obfusPath in results.obfuscatedFileDict.items() )
+
+try:
+    shutil.copytree( os.path.join( parentDir, "dog_walker" ), scrDir )
+
+    print( "--- ANALYZE ---" )
+    analysisResults = analyze( sourceRootDirectory = scrDir
+                             , configSettings      = getConfig() )
+    print( "Is analysis: %s" % (analysisResults.isAnalysis,) )
+    print( "Nothing written: %s" % (os.listdir( workDir ) == [ "source" ],) )
+    print( "Nothing rewritten: %s" % (rewrittenFiles == [] and analysisResults.getBytesOut() == 0,) )
+
+    print( "--- ANALYZE SAME AS OBFUSCATION ---" )
+    obfuscationResults = obfuscate( sourceRootDirectory = scrDir
+                                  , targetRootDirectory = trgDir
+                                  , configSettings      = getConfig() )
+    print( "Rewritten: %s" % (len( rewrittenFiles ) == len( obfuscationResults.fileStatsDict ) > 1,) )
+    print( "Same words: %s" % (analysisResults.obfuscatedWordList == obfuscationResults.obfuscatedWordList,) )
+    print( "Same files: %s" % (getRelativeFileDict( analysisResults, scrDir + "_opy" ) ==
+                               getRelativeFileDict( obfuscationResults, trgDir ),) )
+    print( "Same imports: %s" % (analysisResults.obfuscatedModImports == obfuscationResults.obfuscatedModImports and
+                                 analysisResults.maskedIdentifiers == obfuscationResults.maskedIdentifiers,) )
+finally:
+    opy_pipeline.rewriteFile = realRewriteFile
+    shutil.rmtree( workDir, ignore_errors=True )
@@ -22,3 +22,7 @@ print( "obfuscatedModImports" )
 print( results.obfuscatedModImports )
 print( "maskedIdentifiers" )
 print( results.maskedIdentifiers )
+print( "skippedPublicSet" )
+print( results.skippedPublicSet )
+print( "--- STATISTICS ---" )
+print( results.toJson( indent=4 ) )
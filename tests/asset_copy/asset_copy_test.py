@@ -0,0 +1,64 @@
+from opy import obfuscate, OpyConfig
+import os, sys, shutil, stat, tempfile, time
+
+workDir = tempfile.mkdtemp( prefix="opy_asset_copy_" )
+scrDir  = os.path.join( workDir, "source" )
+assetRelPaths = [ "data.dat", os.path.join( "sub", "image.bin" ) ]
+
+def writeSource( relPath, content ):
+    filePath = os.path.join( scrDir, relPath )
+    if not os.path.isdir( os.path.dirname( filePath ) ):
+        os.makedirs( os.path.dirname( filePath ) )
+    with open( filePath, "wb" ) as f: f.write( content )
+
+def run( copyMode, trgDir ):
+    config = OpyConfig()
+    config.plain_names = [ "main" ]
+    config.asset_copy_mode = copyMode
+    return obfuscate( sourceRootDirectory = scrDir
+                    , targetRootDirectory = trgDir
+                    , configSettings      = config )
+
+def read( filePath ):
+    with open( filePath, "rb" ) as f: return f.read()
+
+def isSameContent( trgDir ):
+    return all( read( os.path.join( scrDir, relPath ) ) == read( os.path.join( trgDir, relPath ) ) for relPath in assetRelPaths )
+
+def isSameFile( trgDir ):
+    return [ os.path.samefile( os.path.join( scrDir, relPath ), os.path.join( trgDir, relPath ) ) for relPath in assetRelPaths ]
+
+try:
+    writeSource( "main.py", b"print( 'assets' )\n" )
+    writeSource( assetRelPaths[0], b"some data\n" )
+    writeSource( assetRelPaths[1], bytes( bytearray( range( 256 ) ) ) )
+
+    for copyMode in [ "copy", "hardlink", "reflink", "update" ]:
+        print( "--- ASSET COPY %s ---" % copyMode.upper() )
+        trgDir = os.path.join( workDir, copyMode )
+        results = run( copyMode, trgDir )
+        print( "Assets counted: %s" % (results.assetFileCount == len( assetRelPaths ),) )
+        print( "Same content: %s" % (isSameContent( trgDir ),) )
+        print( "Linked only if hardlinked: %s" % (isSameFile( trgDir ) == [ copyMode == "hardlink" ] * len( assetRelPaths ),) )
+
+    # An unchanged asset isn't copied again, which would restore its mode
+    print( "--- ASSET COPY UPDATE AGAIN ---" )
+    trgDir = os.path.join( workDir, "update" )
+    assetPath, targetAssetPath = os.path.join( scrDir, assetRelPaths[0] ), os.path.join( trgDir, assetRelPaths[0] )
+    os.chmod( targetAssetPath, stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR )
+    run( "update", trgDir )
+    print( "Unchanged not copied: %s" % (os.stat( targetAssetPath ).st_mode & stat.S_IXUSR != 0,) )
+    writeSource( assetRelPaths[0], b"other data\n" )
+    os.utime( assetPath, ( time.time() + 10, time.time() + 10 ) )
+    run( "update", trgDir )
+    print( "Changed copied: %s" % (isSameContent( trgDir ) and os.stat( targetAssetPath ).st_mode & stat.S_IXUSR == 0,) )
+
+    # Copying over a previously linked target replaces the link rather than writing through it into the source
+    print( "--- ASSET COPY OVER LINK ---" )
+    trgDir = os.path.join( workDir, "hardlink" )
+    sourceContent = read( assetPath )
+    run( "copy", trgDir )
+    print( "Link replaced: %s" % (isSameFile( trgDir ) == [ False ] * len( assetRelPaths ) and isSameContent( trgDir ),) )
+    print( "Source untouched: %s" % (read( assetPath ) == sourceContent,) )
+finally:
+    shutil.rmtree( workDir, ignore_errors=True )
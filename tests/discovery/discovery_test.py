@@ -0,0 +1,77 @@
+from opy import opy_discovery
+import os, shutil, tempfile
+
+rootDir = tempfile.mkdtemp( prefix="opy_discovery_" ).replace( "\\", "/" )
+relPaths = [ "main.py", "test_dummy_file.py", "notes_v1.py", "notes_v12.py"
+           , "pkg/mod.py", "pkg/opy_config.txt", "pkg/build_tools.py"
+           , "build/out.py", "rebuild/again.py", "proj.egg-info/PKG.py", "deep/a/b/c.py" ]
+for relPath in relPaths:
+    filePath = os.path.join( rootDir, relPath )
+    if not os.path.isdir( os.path.dirname( filePath ) ):
+        os.makedirs( os.path.dirname( filePath ) )
+    open( filePath, "w" ).close()
+allPaths = set( "%s/%s" % (rootDir, relPath) for relPath in relPaths )
+
+# A symbolic link to a directory outside the tree, which is neither a file nor followed
+linkedDir = tempfile.mkdtemp( prefix="opy_discovery_linked_" ).replace( "\\", "/" )
+open( os.path.join( linkedDir, "linked.py" ), "w" ).close()
+os.symlink( linkedDir, os.path.join( rootDir, "pkg", "datalink" ) )
+
+# Record the directories that are listed, to see which are pruned
+listedDirs = []
+if opy_discovery.scandir is not None:
+    realScandir = opy_discovery.scandir
+    def recordingScandir( directory ):
+        listedDirs.append( directory )
+        return realScandir( directory )
+    opy_discovery.scandir = recordingScandir
+else:   # Python 2
+    realListdir = os.listdir
+    def recordingListdir( directory ):
+        listedDirs.append( directory )
+        return realListdir( directory )
+    os.listdir = recordingListdir
+
+def scan( skipPathFragments=[], subsetFiles=[], threadCount=opy_discovery.DEFAULT_THREAD_COUNT ):
+    del listedDirs[:]
+    pathFilter = opy_discovery.PathFilter( skipPathFragments, subsetFiles )
+    return set( opy_discovery.scanFiles( rootDir, pathFilter, threadCount ) )
+
+def expect( relPaths ):
+    return set( "%s/%s" % (rootDir, relPath) for relPath in relPaths )
+
+try:
+    print( "--- DISCOVERY ---" )
+
+    # Symbolic links to directories are left alone, as os.walk does
+    print( "Linked directory skipped: %s" % (
+        scan() == allPaths and not any( listedDir.endswith( "/datalink" ) for listedDir in listedDirs ),) )
+
+    # Plain fragments keep their substring semantics, anywhere in the path
+    fragments = [ "test_dummy", "build/", "opy_config.txt", "_tools" ]
+    oldSemantics = set( filePath for filePath in allPaths
+                        if not any( fragment in filePath for fragment in fragments ) )
+    print( "Plain fragments as substrings: %s" % (
+        scan( fragments ) == oldSemantics == scan( fragments, threadCount=1 ),) )
+
+    # Directories holding a fragment aren't even listed
+    print( "Skipped directories pruned: %s" % (
+        not any( listedDir.endswith( ( "/build", "/rebuild" ) ) for listedDir in listedDirs ),) )
+
+    # Glob fragments, where * and ? don't match a /
+    print( "Glob fragments: %s" % (
+        scan( [ "*.egg-info/", "notes_v?.py", "deep*c.py" ] ) ==
+        allPaths - expect( [ "proj.egg-info/PKG.py", "notes_v1.py" ] ),) )
+    print( "Glob directory pruned: %s" % (
+        not any( listedDir.endswith( ".egg-info" ) for listedDir in listedDirs ),) )
+
+    # Subset entries match a complete path or file name, and there a * also matches a /
+    print( "Subset files: %s" % (
+        scan( subsetFiles=[ "mod.py", rootDir + "/main.py", "*/a/*/c.py", "notes_v??.py" ] ) ==
+        expect( [ "pkg/mod.py", "main.py", "deep/a/b/c.py", "notes_v12.py" ] ),) )
+    print( "Skip fragments and subset combined: %s" % (
+        scan( [ "pkg/" ], [ "*.py" ] ) ==
+        allPaths - expect( [ "pkg/mod.py", "pkg/opy_config.txt", "pkg/build_tools.py" ] ),) )
+finally:
+    shutil.rmtree( rootDir, ignore_errors=True )
+    shutil.rmtree( linkedDir, ignore_errors=True )
@@ -0,0 +1,40 @@
+from opy import opy_parser
+
+clearTextMods = [ "os", "sys", "json" ]
+
+# ( source, replacements, masking, expected content, expected obfuscated modules, expected masked names )
+cases = [
+    ( "parenthesized multi-line"
+    , "from os.path import (join,\n    dirname as dn,\n    exists)\nprint(join, dn, exists)\n", {}, True
+    , "from os.path import (join as alias_0,\n    dirname as dn,\n    exists as alias_1)\nprint(alias_0, dn, alias_1)\n"
+    , set(), set( [ "join", "exists" ] ) )
+,   ( "semicolon separated"
+    , "import os; import sys as system; x = os.sep\n", {}, True
+    , "import os as alias_0; import sys as system; x = alias_0.sep\n"
+    , set(), set( [ "os" ] ) )
+,   ( "relative"
+    , "from . import sibling\nfrom ..parent.mod import thing as other\nimport json, mymod.sub\n", {}, True
+    , "from . import sibling\nfrom ..parent.mod import thing as other\nimport json as alias_0, mymod.sub\n"
+    , set( [ ".", "..parent.mod", "mymod.sub" ] ), set( [ "json" ] ) )
+,   ( "alias masking"
+    , "import os\nimport os.path\nprint(os.path.join(os.sep))\n", {}, True
+    , "import os as alias_0\nimport os.path as alias_1\nprint(alias_1.join(alias_0.sep))\n"
+    , set(), set( [ "os", "os.path" ] ) )
+,   ( "replacement"
+    , "import oldmod\nfrom oldmod.sub import x\n", { "oldmod" : "newmod" }, False
+    , "import newmod as oldmod\nfrom newmod.sub import x\n"
+    , set( [ "newmod", "newmod.sub" ] ), set() )
+]
+
+# Incomplete statements, e.g. of a file saved halfway, are left alone
+for source in [ "from\n", "from .\n", "x = 1\nfrom\n", "from . import\n", "from x import (\n", "import os as\n" ]:
+    cases.append( ( "incomplete %r" % (source,), source, {}, True, source, set(), set() ) )
+
+print( "--- IMPORTS ---" )
+allPassed = True
+for name, source, replacements, isMasking, content, modImports, maskedNames in cases:
+    outcome = opy_parser.processImports( source, clearTextMods, replacements, isMasking )
+    isPassed = outcome == ( content, modImports, maskedNames )
+    allPassed = allPassed and isPassed
+    if not isPassed: print( "Failed %s: %r" % (name, outcome) )
+print( "All passed: %s" % (allPassed,) )
@@ -0,0 +1,39 @@
+from opy import obfuscate, obfuscateFiles, OpyConfig
+import os, sys, io, zipfile
+
+thisDir   = os.path.dirname( os.path.realpath( sys.argv[0] ) )
+parentDir = os.path.dirname( thisDir )
+scrDir    = os.path.join( parentDir, "dog_walker" )
+trgDir    = os.path.join( thisDir, "obfuscated" )
+
+def getConfig():
+    config = OpyConfig()
+    config.plain_names = [ "poly_walker_test" ]
+    return config
+
+# Read the sources as if from an archive, obfuscate them into an archive in memory
+files = []
+for fileName in sorted( os.listdir( scrDir ) ):
+    filePath = os.path.join( scrDir, fileName )
+    if os.path.isfile( filePath ):
+        with open( filePath, 'rb' ) as f:
+            files.append( (fileName, f.read()) )
+
+archiveBuffer = io.BytesIO()
+archive = zipfile.ZipFile( archiveBuffer, 'w' )
+obfuscateFiles( files, sink=archive.writestr, configSettings=getConfig() )
+archive.close()
+
+# The same sources obfuscated on disk should give the same files
+obfuscate( sourceRootDirectory = scrDir
+         , targetRootDirectory = trgDir
+         , configSettings      = getConfig() )
+
+archive = zipfile.ZipFile( archiveBuffer )
+isIdentical = sorted( archive.namelist() ) == sorted( os.listdir( trgDir ) )
+for name in archive.namelist():
+    with open( os.path.join( trgDir, name ), 'rb' ) as f:
+        isIdentical = isIdentical and f.read() == archive.read( name )
+
+print( "--- IN MEMORY ---" )
+print( "Identical to obfuscation on disk: %s" % (isIdentical,) )
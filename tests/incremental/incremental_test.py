@@ -0,0 +1,48 @@
+from opy import obfuscate, OpyConfig
+import os, sys, shutil, tempfile
+
+thisDir   = os.path.dirname( os.path.realpath( sys.argv[0] ) )
+workDir   = tempfile.mkdtemp( prefix="opy_incremental_" )
+scrDir    = os.path.join( workDir, "source" )
+trgDir    = os.path.join( workDir, "obfuscated" )
+
+def writeSource( relPath, content ):
+    filePath = os.path.join( scrDir, relPath )
+    if not os.path.isdir( os.path.dirname( filePath ) ):
+        os.makedirs( os.path.dirname( filePath ) )
+    with open( filePath, "w" ) as f: f.write( content )
+
+def run( plainNames=[] ):
+    config = OpyConfig()
+    config.incremental = True
+    config.plain_names = plainNames
+    results = obfuscate( sourceRootDirectory = scrDir
+                       , targetRootDirectory = trgDir
+                       , configSettings      = config )
+    # Exactly the obfuscated versions of the current sources and the cache should be there, no temporary files
+    expected = set( obfusPath.replace( "\\", "/" ) for obfusPath in results.obfuscatedFileDict.values() )
+    expected.add( os.path.join( trgDir, ".opy_cache.json" ).replace( "\\", "/" ) )
+    found = set( os.path.join( directory, fileName ).replace( "\\", "/" )
+                 for directory, _, fileNames in os.walk( trgDir ) for fileName in fileNames )
+    return found == expected
+
+try:
+    writeSource( "main.py", "from helpers import tools\nprint( tools.helperFunc() )\n" )
+    writeSource( "helpers/__init__.py", "" )
+    writeSource( "helpers/tools.py", "def helperFunc():\n    return 1\n" )
+    writeSource( "quuxdir/thing.py", "thingValue = 2\n" )
+    print( "--- INCREMENTAL FIRST RUN ---" )
+    print( "No stale files: %s" % run() )
+
+    # Rename a module and introduce a word equal to a directory name, moving the files in it
+    os.remove( os.path.join( scrDir, "helpers/tools.py" ) )
+    writeSource( "helpers/utensils.py", "def helperFunc():\n    return 1\n" )
+    writeSource( "main.py", "from helpers import utensils\nquuxdir = utensils.helperFunc()\nprint( quuxdir )\n" )
+    print( "--- INCREMENTAL RENAMED AND MOVED ---" )
+    print( "No stale files: %s" % run() )
+
+    # Other settings throw the cache away, renaming everything
+    print( "--- INCREMENTAL CACHE DISCARDED ---" )
+    print( "No stale files: %s" % run( plainNames=[ "thingValue" ] ) )
+finally:
+    shutil.rmtree( workDir, ignore_errors=True )
@@ -0,0 +1,31 @@
+from opy import obfuscate, OpyConfig
+import os, sys, subprocess
+
+thisDir   = os.path.dirname( os.path.realpath( sys.argv[0] ) )
+scrDir    = os.path.join( thisDir, "literals" )
+
+def run( directory ):
+    return subprocess.check_output( [ sys.executable, "literals.py" ], cwd=directory )
+
+# Comments between implicitly concatenated strings, f-strings and doubled or
+# escaped quotes should survive obfuscation, whether strings are scrambled or not.
+# The f-strings in the sources require Python 3.6 or later.
+if sys.version_info >= ( 3, 6 ):
+    expected = run( scrDir )
+    for obfuscateStrings in [ False, True ]:
+        for pep8Comments in [ False, True ]:
+            trgDir = os.path.join( thisDir, "obfuscated_%s_%s" % (
+                "strings" if obfuscateStrings else "plain", "pep8" if pep8Comments else "all" ) )
+            config = OpyConfig()
+            config.obfuscate_strings = obfuscateStrings
+            config.pep8_comments = pep8Comments
+            config.plain_names = [ "literals" ]
+            obfuscate( sourceRootDirectory = scrDir
+                     , targetRootDirectory = trgDir
+                     , configSettings      = config )
+            try:
+                isSame = run( trgDir ) == expected
+            except subprocess.CalledProcessError:
+                isSame = False
+            print( "--- LEXER %s ---" % (os.path.basename( trgDir ).upper(),) )
+            print( "Same output: %s" % (isSame,) )
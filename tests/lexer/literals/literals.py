@@ -0,0 +1,27 @@
+# Literals that fooled the regular expressions or the merging of implicitly concatenated strings
+value = 42
+name = 'dog'
+
+concatenated = ('first '    # A comment between the parts
+                'second '
+                # A comment on a line of its own
+                "third")
+commentAfter = ('alone'     # A comment after the last part
+                )
+mixed = ('plain '   # Followed by an f-string
+         f'{name} and {value}')
+fStringFirst = (f'{value} '  # Followed by a plain string
+                'plain')
+fString = f'{name!r:>10} {value:{value}} {{braces}} {"nested " + name}'
+doubled = 'It''s' "a ""doubled"" quote"
+escaped = 'It\'s an \\ escaped "quote" # not a comment'
+triple = '''Triple 'quoted' "text" # no comment'''
+
+print (concatenated)
+print (commentAfter)
+print (mixed)
+print (fStringFirst)
+print (fString)
+print (doubled)
+print (escaped)
+print (triple)
@@ -0,0 +1,34 @@
+from opy import obfuscate, OpyConfig
+import os, sys, subprocess
+
+thisDir   = os.path.dirname( os.path.realpath( sys.argv[0] ) )
+parentDir = os.path.dirname( thisDir )
+scrDir    = os.path.join( parentDir, "dog_walker" )
+
+def getSize( directory ):
+    return sum( os.path.getsize( os.path.join( directory, fileName ) )
+                for fileName in os.listdir( directory ) if fileName.endswith( ".py" ) )
+
+results = {}
+for nameScheme, nameTail in [ ("binary", "_opy_"), ("frequency", "") ]:
+    trgDir = os.path.join( thisDir, "obfuscated_%s" % (nameScheme,) )
+    config = OpyConfig()
+    config.plain_names = [ "poly_walker_test" ]
+    config.name_scheme = nameScheme
+    config.obfuscated_name_tail = nameTail
+    results[nameScheme] = obfuscate( sourceRootDirectory = scrDir
+                                   , targetRootDirectory = trgDir
+                                   , configSettings      = config )
+    # The obfuscated program should still run
+    returnCode = subprocess.call( [ sys.executable, "poly_walker_test.py" ], cwd=trgDir,
+                                  stdout=open( os.devnull, "w" ) )
+    print( "--- NAME SCHEME %s ---" % (nameScheme.upper(),) )
+    print( "Runs: %s" % (returnCode == 0,) )
+    print( "Bytes: %d" % (getSize( trgDir ),) )
+
+# The most frequent words get the shortest names, the names map back to their words
+nameTable = results["frequency"].nameTable
+print( "Longest name: %d characters, binary %d" % (
+    max( len( nameTable.getName( word ) ) for word in nameTable ),
+    max( len( results["binary"].nameTable.getName( word ) ) for word in results["binary"].nameTable ) ) )
+print( "Reversible: %s" % all( nameTable.getWord( nameTable.getName( word ) ) == word for word in nameTable ) )
@@ -0,0 +1,35 @@
+from opy import opy_names
+
+nameTail = "_opy_"
+
+print( "--- NAME TABLE BINARY ---" )
+words = [ "alpha", "_beta", "__gamma", "delta" ]
+nameTable = opy_names.NameTable( nameTail, words )
+print( "Numbered in order: %s" % ([ nameTable.getIndex( word ) for word in words ] == [ 0, 1, 2, 3 ] and list( nameTable ) == words,) )
+print( "Names: %s" % ([ nameTable.getName( word ) for word in words ] == [ "ll_opy_", "_1_opy_", "__1l_opy_", "l11_opy_" ],) )
+print( "Same as getObfuscatedName: %s" % (all( nameTable.getName( word ) == opy_names.getObfuscatedName( index, word, nameTail )
+                                    for index, word in enumerate( words ) ),) )
+print( "Added once: %s" % (nameTable.add( "_beta" ) == 1 and len( nameTable ) == len( words ),) )
+print( "Reversible: %s" % (all( nameTable.getWord( nameTable.getName( word ) ) == word for word in words ),) )
+print( "Defaults: %s" % (nameTable.getName( "epsilon" ) is None and nameTable.getWord( "epsilon", "none" ) == "none" and
+                         not "epsilon" in nameTable,) )
+# Words added after the names were mapped back are mapped back too
+nameTable.update( [ "epsilon", "alpha" ] )
+print( "Reversible after adding: %s" % (nameTable.getWord( nameTable.getName( "epsilon" ) ) == "epsilon" and len( nameTable ) == 5,) )
+print( "Name dict: %s" % (nameTable.getNameDict() == dict( ( word, nameTable.getName( word ) ) for word in words + [ "epsilon" ] ),) )
+
+print( "--- NAME TABLE FREQUENCY ---" )
+print( "Short names: %s" % ([ opy_names.getShortName( number ) for number in [ 0, 25, 26, 27, 61, 62, 26 + 26 * 36 ] ] ==
+                            [ "a", "z", "aa", "ab", "a9", "ba", "aaa" ],) )
+# The most frequent words first, equally frequent ones in order of appearance, skipping the clear words
+nameTable = opy_names.NameTable( "", scheme=opy_names.FREQUENCY, clearWordSet=frozenset( [ "a", "print" ] ) )
+for word, occurrences in [ ( "rare", 1 ), ( "often", 3 ), ( "_often", 3 ), ( "rare", 1 ) ]:
+    nameTable.count( word, occurrences )
+print( "Nothing numbered before adding: %s" % (len( nameTable ) == 0,) )
+nameTable.addCounted()
+print( "Numbered by frequency: %s" % (list( nameTable ) == [ "often", "_often", "rare" ],) )
+print( "Names: %s" % ([ nameTable.getName( word ) for word in nameTable ] == [ "b", "_c", "d" ],) )
+nameTable.count( "often", 10 )
+nameTable.count( "later" )
+nameTable.addCounted()
+print( "Names kept: %s" % ([ nameTable.getName( word ) for word in nameTable ] == [ "b", "_c", "d", "e" ],) )
@@ -0,0 +1,31 @@
+from opy import obfuscate, OpyConfig
+import os, sys, filecmp
+
+thisDir   = os.path.dirname( os.path.realpath( sys.argv[0] ) )
+parentDir = os.path.dirname( thisDir )
+scrDir    = os.path.join( parentDir, "dog_walker" )
+cfgFile   = os.path.join( scrDir,    "opy_config.txt" )
+
+def compareDirs( dirA, dirB ):
+    comparison = filecmp.dircmp( dirA, dirB )
+    _, mismatch, errors = filecmp.cmpfiles( dirA, dirB, comparison.common_files, shallow=False )
+    return not ( comparison.left_only or comparison.right_only or mismatch or errors )
+
+# Processes may only be started from the main module
+if __name__ == '__main__':
+    # Public identifiers are collected from all files before any is rewritten,
+    # so skipping them mustn't depend on the order in which the files are done either
+    for skipPublic in [ False, True ]:
+        trgDirs = {}
+        for jobs in [ 1, 4 ]:
+            trgDirs[jobs] = os.path.join( thisDir, "obfuscated_%d%s" % (jobs, "_public" if skipPublic else "") )
+            config = OpyConfig()
+            config.plain_names = [ "poly_walker_test" ]
+            config.skip_public = skipPublic
+            config.jobs = jobs
+            obfuscate( sourceRootDirectory = scrDir
+                     , targetRootDirectory = trgDirs[jobs]
+                     , configSettings      = config )
+
+        print( "--- PARALLEL%s ---" % (" SKIP PUBLIC" if skipPublic else "",) )
+        print( "Identical results: %s" % compareDirs( trgDirs[1], trgDirs[4] ) )
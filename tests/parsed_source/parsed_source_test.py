@@ -0,0 +1,65 @@
+from opy import obfuscate, OpyConfig, opy_parser
+import os, sys, json, shutil, tempfile
+
+workDir = tempfile.mkdtemp( prefix="opy_parsed_source_" )
+scrDir  = os.path.join( workDir, "source" )
+trgDir  = os.path.join( workDir, "obfuscated" )
+
+# Record the contents that are parsed
+parsedContents = []
+realParse = opy_parser.ast.parse
+def recordingParse( source, *args, **kwargs ):
+    parsedContents.append( source )
+    return realParse( source, *args, **kwargs )
+opy_parser.ast.parse = recordingParse
+
+def writeSource( fileName, content ):
+    with open( os.path.join( scrDir, fileName ), "w" ) as f: f.write( content )
+
+def run():
+    del parsedContents[:]
+    config = OpyConfig()
+    config.incremental = True
+    config.skip_public = True
+    config.plain_names = [ "shapes", "main", "copied" ]
+    return obfuscate( sourceRootDirectory = scrDir
+                    , targetRootDirectory = trgDir
+                    , configSettings      = config )
+
+shapesSource = "class Square:\n    def __init__( self, side ):\n        self.side = side\n        self._hidden = 0\n\n    def getArea( self ):\n        return self.side * self.side\n"
+mainSource   = "import shapes\nsquare = shapes.Square( 3 )\nprint( square.getArea() )\n"
+
+try:
+    print( "--- PARSED SOURCE ---" )
+    parsedSource = opy_parser.ParsedSource( shapesSource )
+    publicIdentifierSet = parsedSource.getPublicIdentifiers()
+    parsedSource.getPublicIdentifiers()
+    print( "Public identifiers: %s" % (publicIdentifierSet == opy_parser.findPublicIdentifiers( shapesSource ) and
+                                       set( [ "Square", "getArea", "side" ] ) <= publicIdentifierSet,) )
+    print( "Parsed once: %s" % (parsedContents.count( shapesSource ) == 2,) )  # Once by the ParsedSource, once by findPublicIdentifiers
+    parsedSource.release()
+    restoredSource = opy_parser.ParsedSource.fromDict( json.loads( json.dumps( parsedSource.toDict() ) ) )
+    print( "Restored: %s" % (restoredSource.getPublicIdentifiers() == publicIdentifierSet,) )
+
+    os.makedirs( scrDir )
+    writeSource( "shapes.py", shapesSource )
+    writeSource( "main.py", mainSource )
+
+    print( "--- PARSED SOURCE CACHED ---" )
+    run()
+    print( "All parsed: %s" % (sorted( parsedContents ) == sorted( [ shapesSource, mainSource ] ),) )
+    with open( os.path.join( trgDir, ".opy_cache.json" ) ) as f: cacheDict = json.load( f )
+    print( "Outcomes cached: %s" % (len( cacheDict[ "parsed" ] ) == 2,) )
+
+    # Only a changed file is parsed again, not even a new file whose content was parsed before
+    mainSource += "print( square.side )\n"
+    writeSource( "main.py", mainSource )
+    writeSource( "copied.py", shapesSource )
+    results = run()
+    print( "Only changed parsed: %s" % (parsedContents == [ mainSource ],) )
+    print( "Same public identifiers: %s" % (results.skippedPublicSet >= publicIdentifierSet,) )
+    run()
+    print( "Unchanged not parsed: %s" % (parsedContents == [],) )
+finally:
+    opy_parser.ast.parse = realParse
+    shutil.rmtree( workDir, ignore_errors=True )
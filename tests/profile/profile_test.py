@@ -0,0 +1,72 @@
+from opy import Obfuscator, OpyConfig, OpyHooks, opy_obfuscator
+import os, sys, shutil, tempfile, pstats
+
+thisDir   = os.path.dirname( os.path.realpath( sys.argv[0] ) )
+parentDir = os.path.dirname( thisDir )
+scrDir    = os.path.join( parentDir, "dog_walker" )
+workDir   = tempfile.mkdtemp( prefix="opy_profile_" )
+trgDir    = os.path.join( workDir, "obfuscated" )
+
+class MeasurementCollector( OpyHooks ):
+    def __init__( self ):
+        self.phaseNames = []
+        self.fileStatsDict = {}
+        self.resultsList = []
+
+    def onPhase( self, phaseName, seconds ):
+        self.phaseNames.append( phaseName )
+
+    def onFile( self, clearRelPath, fileStats ):
+        self.fileStatsDict[clearRelPath] = fileStats
+
+    def onRun( self, results ):
+        self.resultsList.append( results )
+
+def run( profileList, hooks=None ):
+    config = OpyConfig()
+    config.plain_names = [ "poly_walker_test" ]
+    config.profile = profileList
+    config.profile_directory = workDir
+    return Obfuscator( configSettings=config, hooks=hooks ).obfuscate( scrDir, trgDir )
+
+def getProfilePath( extension ):
+    return os.path.join( workDir, "%s.%s" % (opy_obfuscator.PROFILE_FILE_PRE_NAME, extension) )
+
+try:
+    print( "--- PROFILE HOOKS ---" )
+    hooks = MeasurementCollector()
+    results = run( [], hooks )
+    print( "Phases reported: %s" % (hooks.phaseNames == list( results.phaseSecondsDict.keys() ),) )
+    print( "Files reported: %s" % (hooks.fileStatsDict == results.fileStatsDict and len( results.fileStatsDict ) > 1,) )
+    print( "Run reported: %s" % (hooks.resultsList == [ results ],) )
+    print( "No steps: %s" % (all( not fileStats.stepSecondsDict and not fileStats.counterDict
+                                  for fileStats in results.fileStatsDict.values() ),) )
+
+    print( "--- PROFILE STEPS ---" )
+    results = run( [ "steps" ] )
+    print( "Steps timed: %s" % (all( "rename" in fileStats.stepSecondsDict for fileStats in results.fileStatsDict.values() ),) )
+    print( "Substitutions counted: %s" % (all( fileStats.counterDict.get( "substitutions", 0 ) > 0
+                                               for fileStats in results.fileStatsDict.values() ),) )
+
+    print( "--- PROFILE CPROFILE ---" )
+    run( [ "cprofile" ] )
+    print( "Profile loadable: %s" % (pstats.Stats( getProfilePath( "prof" ) ).total_calls > 0,) )
+
+    # The profilers are process wide, so a run doesn't profile while another one does
+    print( "--- PROFILE CONCURRENT ---" )
+    os.remove( getProfilePath( "prof" ) )
+    opy_obfuscator.processProfileLock.acquire()
+    try:
+        results = run( [ "cprofile" ] )
+    finally:
+        opy_obfuscator.processProfileLock.release()
+    print( "Run not profiled: %s" % (len( results.fileStatsDict ) > 1 and not os.path.exists( getProfilePath( "prof" ) ),) )
+
+    if sys.version_info >= ( 3, 4 ):
+        import tracemalloc
+        print( "--- PROFILE TRACEMALLOC ---" )
+        run( [ "tracemalloc" ] )
+        print( "Snapshot loadable: %s" % (len( tracemalloc.Snapshot.load( getProfilePath( "tracemalloc" ) ).traces ) > 0,) )
+        print( "Tracing stopped: %s" % (not tracemalloc.is_tracing(),) )
+finally:
+    shutil.rmtree( workDir, ignore_errors=True )
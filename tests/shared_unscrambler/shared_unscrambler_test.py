@@ -0,0 +1,46 @@
+from opy import obfuscate, OpyConfig
+import os, sys, shutil, tempfile, subprocess
+
+workDir = tempfile.mkdtemp( prefix="opy_shared_unscrambler_" )
+scrDir  = os.path.join( workDir, "source" )
+trgDir  = os.path.join( workDir, "obfuscated", "mypkg" )   # The target root is a package
+
+def writeSource( relPath, content ):
+    filePath = os.path.join( scrDir, relPath )
+    if not os.path.isdir( os.path.dirname( filePath ) ):
+        os.makedirs( os.path.dirname( filePath ) )
+    with open( filePath, "w" ) as f: f.write( content )
+
+def runPython( args, cwd ):
+    return subprocess.check_output( [ sys.executable ] + args, cwd=cwd ).decode().strip()
+
+try:
+    writeSource( "__init__.py", "" )
+    writeSource( "module.py", "def getGreeting():\n    return 'hello from module'\n" )
+    writeSource( "sub/__init__.py", "" )
+    writeSource( "sub/helper.py", "from ..module import getGreeting\n\ndef getMessage():\n    return getGreeting() + ', ' + 'and helper'\n" )
+    writeSource( "main.py", "import module\nprint( module.getGreeting() )\n" )
+
+    config = OpyConfig()
+    config.obfuscate_strings = True
+    config.shared_unscrambler = True
+    config.plain_names = [ "module", "sub", "helper", "main", "getGreeting", "getMessage" ]
+    obfuscate( sourceRootDirectory = scrDir
+             , targetRootDirectory = trgDir
+             , configSettings      = config )
+
+    print( "--- SHARED UNSCRAMBLER ---" )
+    # Besides the obfuscated sources, there's only the runtime module, whose name is obfuscated too
+    relPaths = set( os.path.relpath( os.path.join( directory, fileName ), trgDir ).replace( "\\", "/" )
+                    for directory, _, fileNames in os.walk( trgDir ) for fileName in fileNames if fileName.endswith( ".py" ) )
+    addedRelPaths = relPaths - set( [ "__init__.py", "module.py", "sub/__init__.py", "sub/helper.py", "main.py" ] )
+    print( "Single runtime module at the root: %s" % (len( relPaths ) == 6 and len( addedRelPaths ) == 1 and not "/" in addedRelPaths.pop(),) )
+    print( "Strings scrambled: %s" % (not "hello" in open( os.path.join( trgDir, "module.py" ) ).read(),) )
+    # Imported as a package from outside the target root, which isn't on the module search path
+    print( "Imported as package: %s" % (
+        runPython( [ "-c", "import mypkg.sub.helper; print( mypkg.sub.helper.getMessage() )" ],
+                   os.path.dirname( trgDir ) ) == "hello from module, and helper",) )
+    # Run as a script from the target root
+    print( "Run as script: %s" % (runPython( [ "main.py" ], trgDir ) == "hello from module",) )
+finally:
+    shutil.rmtree( workDir, ignore_errors=True )
@@ -0,0 +1,71 @@
+from opy import Obfuscator, OpyConfig, opy_skip_index
+import os, sys, shutil, tempfile, threading
+
+thisDir   = os.path.dirname( os.path.realpath( sys.argv[0] ) )
+parentDir = os.path.dirname( thisDir )
+scrDir    = os.path.join( parentDir, "dog_walker" )
+workDir   = tempfile.mkdtemp( prefix="opy_skip_index_" )
+indexDir  = os.path.join( workDir, "index" )
+
+# Count the modules that are imported and walked, rather than read from the index
+inspectedModules = []
+realGetModuleNames = opy_skip_index.getModuleNames
+def countingGetModuleNames( moduleName, *args, **kwargs ):
+    inspectedModules.append( moduleName )
+    return realGetModuleNames( moduleName, *args, **kwargs )
+opy_skip_index.getModuleNames = countingGetModuleNames
+
+def getObfuscator( useIndex ):
+    config = OpyConfig()
+    config.plain_names = [ "poly_walker_test" ]
+    config.skip_index = useIndex
+    config.skip_index_directory = indexDir
+    return Obfuscator( configSettings=config )
+
+def run( name, useIndex ):
+    del inspectedModules[:]
+    trgDir = os.path.join( workDir, name )
+    getObfuscator( useIndex ).obfuscate( scrDir, trgDir )
+    contentDict = {}
+    for fileName in os.listdir( trgDir ):
+        with open( os.path.join( trgDir, fileName ), "rb" ) as f: contentDict[fileName] = f.read()
+    return contentDict
+
+def getIndexFileNames():
+    return [ fileName for _, _, fileNames in os.walk( indexDir ) for fileName in fileNames ]
+
+try:
+    moduleCount = 1 + len( OpyConfig().external_modules )   # The builtins and each external module
+    plainContentDict = run( "plain", False )
+
+    print( "--- SKIP INDEX COLD ---" )
+    coldContentDict = run( "cold", True )
+    print( "Same output: %s" % (coldContentDict == plainContentDict,) )
+    print( "Modules inspected: %s" % (len( inspectedModules ) == moduleCount,) )
+    print( "Modules indexed: %s" % (len( getIndexFileNames() ) == moduleCount,) )
+
+    print( "--- SKIP INDEX WARM ---" )
+    warmContentDict = run( "warm", True )
+    print( "Same output: %s" % (warmContentDict == plainContentDict,) )
+    print( "No modules inspected: %s" % (inspectedModules == [],) )
+
+    # Warming rebuilds the index, even if the configuration doesn't use it
+    print( "--- SKIP INDEX REWARMED ---" )
+    del inspectedModules[:]
+    getObfuscator( False ).warmSkipIndex()
+    print( "Modules inspected: %s" % (len( inspectedModules ) == moduleCount,) )
+    print( "Same output: %s" % (run( "rewarmed", True ) == plainContentDict and inspectedModules == [],) )
+
+    # Runs sharing the index may save the same module at the same time, which shouldn't leave a torn file
+    print( "--- SKIP INDEX CONCURRENT ---" )
+    expectedNames = opy_skip_index.SkipIndex( indexDir, "_opy_" ).getNames( "json" )
+    saveThreads = [ threading.Thread( target=opy_skip_index.SkipIndex( indexDir, "_opy_" ).getNames, args=( "json", True ) )
+                    for _ in range( 8 ) ]
+    for saveThread in saveThreads: saveThread.start()
+    for saveThread in saveThreads: saveThread.join()
+    del inspectedModules[:]
+    print( "Index intact: %s" % (
+        opy_skip_index.SkipIndex( indexDir, "_opy_" ).getNames( "json" ) == expectedNames and inspectedModules == [],) )
+    print( "No temporary files left: %s" % (len( getIndexFileNames() ) == moduleCount,) )
+finally:
+    shutil.rmtree( workDir, ignore_errors=True )
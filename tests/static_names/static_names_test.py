@@ -0,0 +1,38 @@
+from opy import opy_skip_index, OpyConfig
+import os, sys, shutil, tempfile
+
+plainMarker = "_opy_"
+
+# Standard modules are imported in any case, so both ways should find the same names,
+# including those only existing at runtime, e.g. the attributes of re.Match
+print( "--- STATIC STANDARD MODULES ---" )
+isSame = True
+for moduleName in OpyConfig().external_modules + [ "collections.abc", "xml.dom.minidom" ]:
+    staticNames, _ = opy_skip_index.getStaticModuleNames( moduleName, plainMarker )
+    importedNames, _ = opy_skip_index.getModuleNames( moduleName, plainMarker )
+    if staticNames != importedNames:
+        print( "Differs for %s: %s" % (moduleName, sorted( importedNames ^ staticNames )[ :10 ]) )
+        isSame = False
+print( "Same as imported: %s" % (isSame,) )
+if sys.version_info[0] > 2:   # Python 2 doesn't expose these, nor finds module sources without importing them
+    print( "Runtime attributes: %s" % (
+        set( [ "lastgroup", "endpos", "regs", "expand" ] ) <= opy_skip_index.getStaticModuleNames( "re", plainMarker )[0],) )
+
+# A third party module is parsed rather than imported, while the standard modules it imports are inspected
+def checkThirdPartyModule():
+    print( "--- STATIC THIRD PARTY MODULE ---" )
+    packageDir = tempfile.mkdtemp( prefix="opy_static_" )
+    try:
+        with open( os.path.join( packageDir, "opy_static_probe.py" ), "w" ) as f:
+            f.write( "import re\nclass Probe:\n    def probeMethod( self, probeArgument ): pass\n" )
+        sys.path.insert( 0, packageDir )
+        names, isInspected = opy_skip_index.getStaticModuleNames( "opy_static_probe", plainMarker )
+        print( "Parsed: %s" % (isInspected and set( [ "Probe", "probeMethod", "probeArgument" ] ) <= names,) )
+        print( "Not imported: %s" % (not "opy_static_probe" in sys.modules,) )
+        print( "Imported standard module inspected: %s" % ("lastgroup" in names,) )
+    finally:
+        sys.path.remove( packageDir )
+        shutil.rmtree( packageDir, ignore_errors=True )
+
+if sys.version_info[0] > 2:
+    checkThirdPartyModule()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from opy import obfuscate, OpyConfig, opy_pipeline
+import os, sys, shutil, tempfile, subprocess
+
+plainMarker = "_opy_"
+literalSources = [ u"'hello'", u'"world"', u"'''multi\nline'''", u"u'ünïcode'", u"('con' 'cat')" ]
+
+# Run the generated unscrambler with an eval that counts the literals it decodes
+evaluatedLiterals = []
+def countingEval( stringLiteral ):
+    evaluatedLiterals.append( stringLiteral )
+    return eval( stringLiteral )
+namespace = { "eval": countingEval }
+exec( opy_pipeline.getUnScrambler( plainMarker ), namespace )
+unScramble = namespace[ "unScramble" + plainMarker ]
+
+print( "--- UNSCRAMBLE ---" )
+scrambler = opy_pipeline.Scrambler()
+keyedLiterals = [ eval( scrambler.scramble( literalSource ) ) for literalSource in literalSources ]
+expectedStrings = [ eval( literalSource ) for literalSource in literalSources ]
+print( "Decoded: %s" % ([ unScramble( keyedLiteral ) for keyedLiteral in keyedLiterals ] == expectedStrings,) )
+print( "Decoded again: %s" % ([ unScramble( keyedLiteral ) for keyedLiteral in keyedLiterals ] == expectedStrings,) )
+print( "Evaluated once each: %s" % (evaluatedLiterals == literalSources,) )
+
+# The cached strings are the same in an obfuscated script, that decodes a literal in a loop
+print( "--- UNSCRAMBLE OBFUSCATED ---" )
+workDir = tempfile.mkdtemp( prefix="opy_unscramble_" )
+try:
+    scrDir = os.path.join( workDir, "source" )
+    trgDir = os.path.join( workDir, "obfuscated" )
+    os.makedirs( scrDir )
+    with open( os.path.join( scrDir, "greeter.py" ), "w" ) as f:
+        f.write( "def getGreeting( index ):\n    return 'hello ' + \"%d\" % index\n\nfor index in range( 3 ):\n    print( getGreeting( index ) )\n" )
+    config = OpyConfig()
+    config.obfuscate_strings = True
+    config.plain_names = [ "greeter" ]
+    obfuscate( sourceRootDirectory = scrDir
+             , targetRootDirectory = trgDir
+             , configSettings      = config )
+    print( "Strings scrambled: %s" % (not "hello" in open( os.path.join( trgDir, "greeter.py" ) ).read(),) )
+    output = subprocess.check_output( [ sys.executable, "greeter.py" ], cwd=trgDir ).decode().split()
+    print( "Same output: %s" % (output == [ "hello", "0", "hello", "1", "hello", "2" ],) )
+finally:
+    shutil.rmtree( workDir, ignore_errors=True )
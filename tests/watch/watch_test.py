@@ -0,0 +1,56 @@
+from opy import Obfuscator, OpyConfig, OpyHooks
+import os, sys, time, shutil, tempfile, threading, subprocess
+
+class RunCollector( OpyHooks ):
+    def __init__( self ):
+        self.resultsList = []
+
+    def onRun( self, results ):
+        self.resultsList.append( results )
+
+def writeSource( scrDir, fileName, content ):
+    with open( os.path.join( scrDir, fileName ), "w" ) as f: f.write( content )
+
+def waitForRuns( hooks, runCount, timeout=60 ):
+    endTime = time.time() + timeout
+    while len( hooks.resultsList ) < runCount and time.time() < endTime:
+        time.sleep( 0.05 )
+    return len( hooks.resultsList ) == runCount
+
+for incremental in [ False, True ]:
+    workDir = tempfile.mkdtemp( prefix="opy_watch_" )
+    scrDir  = os.path.join( workDir, "source" )
+    trgDir  = os.path.join( workDir, "obfuscated" )
+    os.makedirs( scrDir )
+    try:
+        writeSource( scrDir, "main.py", "import helper\nprint( helper.getValue() )\n" )
+        writeSource( scrDir, "helper.py", "def getValue():\n    return 1\n" )
+
+        config = OpyConfig()
+        config.plain_names = [ "main" ]
+        config.incremental = incremental
+        hooks = RunCollector()
+        stopEvent = threading.Event()
+        watcher = threading.Thread( target=Obfuscator( configSettings=config, hooks=hooks ).watch,
+                                    args=( scrDir, trgDir, 0.05, stopEvent ) )
+        watcher.start()
+        try:
+            isFirstRun = waitForRuns( hooks, 1 )
+            writeSource( scrDir, "helper.py", "def getValue():\n    return 12345\n" )
+            isSecondRun = waitForRuns( hooks, 2 )
+        finally:
+            stopEvent.set()
+            watcher.join()
+
+        output = subprocess.check_output( [ sys.executable, "main.py" ], cwd=trgDir ).decode().strip()
+        secondResults = hooks.resultsList[ -1 ]
+        print( "--- WATCH %s ---" % ("INCREMENTAL" if incremental else "NOT INCREMENTAL",) )
+        print( "Rerun upon change: %s" % (isFirstRun and isSecondRun,) )
+        print( "Changed output: %s" % (output == "12345",) )
+        print( "Only the changed file rewritten: %s" % (
+            secondResults.getWrittenFileCount() == 1 and secondResults.getReusedFileCount() == 1,) )
+        # The cache maps clear names onto obfuscated ones, so only stored if asked for
+        print( "Cache file stored as configured: %s" % (
+            os.path.exists( os.path.join( trgDir, ".opy_cache.json" ) ) == incremental,) )
+    finally:
+        shutil.rmtree( workDir, ignore_errors=True )
@@ -0,0 +1,55 @@
+from opy import obfuscate, OpyConfig
+import os, sys, shutil, tempfile, time
+
+workDir = tempfile.mkdtemp( prefix="opy_write_changed_" )
+scrDir  = os.path.join( workDir, "source" )
+trgDir  = os.path.join( workDir, "obfuscated" )
+
+def writeSource( fileName, content ):
+    with open( os.path.join( scrDir, fileName ), "w" ) as f: f.write( content )
+
+def run():
+    config = OpyConfig()
+    config.plain_names = [ "shapes", "main" ]
+    return obfuscate( sourceRootDirectory = scrDir
+                    , targetRootDirectory = trgDir
+                    , configSettings      = config )
+
+def getTargetStats():
+    return dict( ( fileName, os.stat( os.path.join( trgDir, fileName ) ).st_mtime ) for fileName in os.listdir( trgDir ) )
+
+def getTargetContents():
+    contentDict = {}
+    for fileName in os.listdir( trgDir ):
+        with open( os.path.join( trgDir, fileName ), "rb" ) as f: contentDict[fileName] = f.read()
+    return contentDict
+
+try:
+    os.makedirs( scrDir )
+    writeSource( "shapes.py", "class Square:\n    def __init__( self, side ):\n        self.side = side\n\n    def getArea( self ):\n        return self.side * self.side\n" )
+    writeSource( "main.py", "import shapes\nsquare = shapes.Square( 3 )\nprint( square.getArea() )\n" )
+
+    print( "--- WRITE CHANGED FIRST ---" )
+    results = run()
+    print( "All written: %s" % (results.getWrittenFileCount() == 2,) )
+    firstStats, firstContents = getTargetStats(), getTargetContents()
+    time.sleep( 1.1 )   # So a rewrite would show in the mtime, even on filesystems with a coarse one
+
+    print( "--- WRITE CHANGED UNCHANGED ---" )
+    results = run()
+    print( "None written: %s" % (results.getWrittenFileCount() == 0 and len( results.fileStatsDict ) == 2,) )
+    print( "Mtimes kept: %s" % (getTargetStats() == firstStats,) )
+    print( "Same output: %s" % (getTargetContents() == firstContents,) )
+
+    # A change that adds no new words leaves the name table and so the other obfuscated files as they are
+    print( "--- WRITE CHANGED ONE SOURCE ---" )
+    writeSource( "main.py", "import shapes\nsquare = shapes.Square( 3 )\nprint( square.getArea() )\nprint( square.side )\n" )
+    results = run()
+    print( "One written: %s" % (
+        [ relPath for relPath, fileStats in results.fileStatsDict.items() if fileStats.isWritten ] == [ "main.py" ],) )
+    secondStats = getTargetStats()
+    print( "Other mtime kept: %s" % (secondStats[ "shapes.py" ] == firstStats[ "shapes.py" ] and
+                                     secondStats[ "main.py" ] != firstStats[ "main.py" ],) )
+    print( "No temporary files left: %s" % (sorted( os.listdir( trgDir ) ) == [ "main.py", "shapes.py" ],) )
+finally:
+    shutil.rmtree( workDir, ignore_errors=True )